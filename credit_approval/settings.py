@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from decouple import config
 import dj_database_url
+from celery.schedules import crontab
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,8 +56,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'loans.middleware.RepeatedQueryMiddleware',
 ]
 
+# Times one query shape may run in a request before RepeatedQueryMiddleware
+# (active only with DEBUG) logs it as a possible N+1
+REPEATED_QUERY_THRESHOLD = config('REPEATED_QUERY_THRESHOLD', default=5, cast=int)
+
 ROOT_URLCONF = 'credit_approval.urls'
 
 TEMPLATES = [
@@ -136,6 +143,47 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# Redis in production (shared with Celery, on a separate database), local memory otherwise
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=None)
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a customer's credit profile stays cached
+CREDIT_SCORE_CACHE_TIMEOUT = config('CREDIT_SCORE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Seconds a serialized view-loan / view-loans response stays cached
+LOAN_RESPONSE_CACHE_TIMEOUT = config('LOAN_RESPONSE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Seconds a create-loan response is replayed to retries with the same Idempotency-Key
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+
+# Seconds an Idempotency-Key stays claimed by a request that has not finished;
+# keep it above the longest create-loan request (the gunicorn timeout)
+IDEMPOTENCY_CLAIM_TIMEOUT = config('IDEMPOTENCY_CLAIM_TIMEOUT', default=120, cast=int)
+
+# Seconds a check-eligibility quote token can be redeemed at create-loan
+QUOTE_TOKEN_MAX_AGE = config('QUOTE_TOKEN_MAX_AGE', default=300, cast=int)
+
+# Serve check-eligibility, view-loan and view-loans with the async views in
+# loans/async_views.py; enable when running under ASGI (uvicorn)
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+# Page sizes of the paginated view-loans listing
+CUSTOMER_LOANS_PAGE_SIZE = config('CUSTOMER_LOANS_PAGE_SIZE', default=100, cast=int)
+CUSTOMER_LOANS_MAX_PAGE_SIZE = config('CUSTOMER_LOANS_MAX_PAGE_SIZE', default=1000, cast=int)
+
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
@@ -148,6 +196,8 @@ REST_FRAMEWORK = {
 
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 CSRF_TRUSTED_ORIGINS = ['https://credit-approval-system-sigma.vercel.app']
 
 # Celery Configuration
@@ -157,3 +207,25 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+CELERY_BEAT_SCHEDULE = {
+    # Subtract loans that matured yesterday from their customers' current debt
+    'release-matured-loan-debt': {
+        'task': 'loans.tasks.release_matured_loan_debt',
+        'schedule': crontab(hour=0, minute=15),
+    },
+    # Full recompute to catch any drift in the incrementally maintained debt
+    'reconcile-customer-debt': {
+        'task': 'loans.tasks.reconcile_customer_debt',
+        'schedule': crontab(hour=1, minute=0, day_of_week='sunday'),
+    },
+    'purge-idempotency-keys': {
+        'task': 'loans.tasks.purge_idempotency_keys',
+        'schedule': crontab(minute=30),
+    },
+}
+
+# Rows written per bulk upsert during data ingestion
+INGESTION_CHUNK_SIZE = config('INGESTION_CHUNK_SIZE', default=1000, cast=int)
+
+# Rows per parallel Celery task in asynchronous ingestion
+INGESTION_SHARD_SIZE = config('INGESTION_SHARD_SIZE', default=50000, cast=int)
@@ -0,0 +1,19 @@
+"""
+Gunicorn settings: gunicorn -c gunicorn.conf.py
+Serves the WSGI application with sync workers, or with ASYNC_VIEWS=True the
+ASGI application with uvicorn workers, where the eligibility and loan read
+endpoints run as native async views.
+"""
+import multiprocessing
+
+from decouple import config as env
+
+
+ASYNC_VIEWS = env('ASYNC_VIEWS', default=False, cast=bool)
+
+wsgi_app = 'credit_approval.asgi:application' if ASYNC_VIEWS else 'credit_approval.wsgi:application'
+worker_class = 'uvicorn.workers.UvicornWorker' if ASYNC_VIEWS else 'sync'
+bind = env('BIND', default='0.0.0.0:8000')
+workers = env('WEB_CONCURRENCY', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+timeout = env('WEB_TIMEOUT', default=60, cast=int)
+keepalive = 5
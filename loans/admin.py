@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Customer, Loan
+from .models import Customer, Loan, CustomerLoanSummary, QuarantinedRow
+from .response_cache import touch_customers
+from .summaries import rebuild_loan_summaries
 
 
 @admin.register(Customer)
@@ -19,3 +21,39 @@ class LoanAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('customer')
+    
+    def save_model(self, request, obj, form, change):
+        previous_customer_id = Loan.objects.filter(pk=obj.pk).values_list('customer_id', flat=True).first() if change else None
+        super().save_model(request, obj, form, change)
+        rebuild_loan_summaries({obj.customer_id, previous_customer_id} - {None})
+        if previous_customer_id not in (None, obj.customer_id):
+            touch_customers([previous_customer_id])
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        rebuild_loan_summaries([obj.customer_id])
+        touch_customers([obj.customer_id])
+    
+    def delete_queryset(self, request, queryset):
+        customer_ids = set(queryset.values_list('customer_id', flat=True))
+        super().delete_queryset(request, queryset)
+        rebuild_loan_summaries(customer_ids)
+        touch_customers(customer_ids)
+
+
+@admin.register(CustomerLoanSummary)
+class CustomerLoanSummaryAdmin(admin.ModelAdmin):
+    list_display = ['customer', 'loan_count', 'total_loan_amount', 'active_emi_sum', 'next_maturity_date', 'updated_at']
+    search_fields = ['customer__first_name', 'customer__last_name']
+    readonly_fields = ['updated_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('customer')
+
+
+@admin.register(QuarantinedRow)
+class QuarantinedRowAdmin(admin.ModelAdmin):
+    list_display = ['source', 'file_path', 'row_number', 'record_id', 'error', 'created_at']
+    list_filter = ['source', 'created_at']
+    search_fields = ['file_path', 'error']
+    readonly_fields = ['source', 'file_path', 'row_number', 'record_id', 'data', 'error', 'created_at']
@@ -0,0 +1,83 @@
+"""
+Month-by-month amortization schedules for loans, either generated lazily one
+row at a time or computed for the whole tenure at once with NumPy.
+"""
+import numpy as np
+
+
+def _schedule_inputs(loan):
+    return (
+        float(loan.loan_amount),
+        float(loan.interest_rate) / (12 * 100),  # Convert annual % to monthly decimal
+        loan.tenure,
+        float(loan.monthly_repayment),
+    )
+
+
+def _row(month, payment, principal, interest, balance):
+    return {
+        'month': month,
+        'payment': round(payment, 2),
+        'principal': round(principal, 2),
+        'interest': round(interest, 2),
+        'balance': round(balance, 2),
+    }
+
+
+def iter_amortization_schedule(loan):
+    """
+    Lazily yield one schedule row per month. The last installment (or an
+    earlier one that would overpay) is adjusted to clear the remaining balance.
+    """
+    balance, monthly_rate, tenure, monthly_payment = _schedule_inputs(loan)
+
+    for month in range(1, tenure + 1):
+        interest = balance * monthly_rate
+        principal = monthly_payment - interest
+        if month == tenure or principal > balance:
+            principal = balance
+        balance -= principal
+        yield _row(month, principal + interest, principal, interest, balance)
+
+
+def amortization_table(loan):
+    """
+    Compute the full schedule at once. Opening balances come from the closed form
+    B_k = P(1 + r)^k - A((1 + r)^k - 1) / r, so rows can differ from
+    iter_amortization_schedule by floating point rounding only.
+    Returns a dict of NumPy arrays keyed like the schedule rows.
+    """
+    loan_amount, monthly_rate, tenure, monthly_payment = _schedule_inputs(loan)
+    months = np.arange(tenure + 1)
+
+    if monthly_rate == 0:
+        balances = loan_amount - monthly_payment * months
+    else:
+        growth = (1 + monthly_rate) ** months
+        balances = loan_amount * growth - monthly_payment * (growth - 1) / monthly_rate
+    # Once the loan is paid off the balance stays at zero; the last month clears it
+    balances = np.maximum(balances, 0)
+    balances[-1] = 0
+
+    opening = balances[:-1]
+    closing = balances[1:]
+    interest = opening * monthly_rate
+    principal = opening - closing
+
+    return {
+        'month': months[1:],
+        'payment': principal + interest,
+        'principal': principal,
+        'interest': interest,
+        'balance': closing,
+    }
+
+
+def amortization_rows(table):
+    """Convert an amortization_table into a list of schedule rows"""
+    return [
+        _row(int(month), float(payment), float(principal), float(interest), float(balance))
+        for month, payment, principal, interest, balance in zip(
+            table['month'], table['payment'], table['principal'], table['interest'], table['balance']
+        )
+    ]
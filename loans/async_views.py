@@ -0,0 +1,179 @@
+"""
+Native async versions of the I/O-bound eligibility and loan read endpoints,
+served instead of the DRF views in views.py when ASYNC_VIEWS is set (under
+ASGI). DRF 3.14 views are sync only, so these are plain Django async views
+that reproduce the DRF responses byte for byte, errors included.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import replace_query_param
+
+from .fast_serializers import LOAN_DETAIL_FIELDS, customer_loan_data, loan_detail_data
+from .models import Loan
+from .quotes import issue_quote_token
+from .renderers import FastJSONRenderer
+from .response_cache import (
+    acached_data,
+    acustomer_loans_validators,
+    aloan_validators,
+    not_modified_response,
+    set_validator_headers
+)
+from .serializers import CustomerLoansQuerySerializer, LoanEligibilitySerializer
+from .services import acheck_loan_eligibility
+from .views import _customer_loans_after, _eligibility_response_data
+
+
+# The same renderers as the DRF views: orjson only for the float-free loan bodies
+_renderer = JSONRenderer()
+_fast_renderer = FastJSONRenderer()
+
+
+def _json_response(data, status_code=status.HTTP_200_OK, renderer=_renderer):
+    return HttpResponse(renderer.render(data), status=status_code, content_type=renderer.media_type)
+
+
+def async_api_view(methods):
+    """
+    What the async views need from DRF's @api_view: the method check, CSRF
+    exemption and 404/405 bodies with DRF's status codes and messages
+    """
+    allowed = set(methods) | ({'HEAD'} if 'GET' in methods else set())
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in allowed:
+                response = _json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+                response['Allow'] = ', '.join(sorted(allowed))
+                return response
+            try:
+                return await view(request, *args, **kwargs)
+            except Http404:
+                return _json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+        # django.views.decorators.csrf.csrf_exempt wraps in a sync function in Django 4.2
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def _parse_json(request):
+    """(data, None) for a JSON request body, or (None, the 415 or 400 response DRF would give)"""
+    if not request.body:
+        return {}, None
+    if request.content_type != 'application/json':
+        content_type = request.META.get('CONTENT_TYPE', '')
+        return None, _json_response(
+            {'detail': f'Unsupported media type "{content_type}" in request.'}, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+    try:
+        return json.loads(request.body), None
+    except ValueError as exc:
+        return None, _json_response({'detail': f'JSON parse error - {exc}'}, status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view(['POST'])
+async def check_eligibility(request):
+    """
+    Check loan eligibility for a customer
+    """
+    data, error_response = _parse_json(request)
+    if error_response is not None:
+        return error_response
+
+    serializer = LoanEligibilitySerializer(data=data)
+    if serializer.is_valid():
+        eligibility_result = await acheck_loan_eligibility(
+            serializer.validated_data['customer_id'],
+            serializer.validated_data['loan_amount'],
+            serializer.validated_data['interest_rate'],
+            serializer.validated_data['tenure']
+        )
+        response_data = _eligibility_response_data(serializer.validated_data, eligibility_result)
+        response_data['quote_token'] = issue_quote_token(serializer.validated_data, eligibility_result)
+        return _json_response(response_data)
+    return _json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view(['GET'])
+async def view_loan(request, loan_id):
+    """
+    View details of a specific loan. Supports If-None-Match / If-Modified-Since.
+    """
+    validators = await aloan_validators(loan_id)
+    if validators is None:
+        raise Http404('No Loan matches the given query.')
+
+    async def serialize():
+        row = await Loan.objects.filter(loan_id=loan_id).values(*LOAN_DETAIL_FIELDS).afirst()
+        if row is None:
+            raise Http404('No Loan matches the given query.')
+        return loan_detail_data(row)
+
+    response = not_modified_response(request, validators)
+    if response is None:
+        response = _json_response(await acached_data(validators, serialize), renderer=_fast_renderer)
+    return set_validator_headers(response, validators)
+
+
+@async_api_view(['GET'])
+async def view_customer_loans(request, customer_id):
+    """
+    View all loans for a specific customer, with the same ?page_size=, ?cursor=
+    and ?stream=true options as views.view_customer_loans
+    """
+    query = CustomerLoansQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return _json_response(query.errors, status.HTTP_400_BAD_REQUEST)
+    cursor = query.validated_data.get('cursor')
+
+    validators = await acustomer_loans_validators(customer_id)
+    if validators is None:
+        raise Http404('No Customer matches the given query.')
+
+    response = not_modified_response(request, validators)
+    if response is not None:
+        return set_validator_headers(response, validators)
+
+    if query.validated_data['stream']:
+        response = StreamingHttpResponse(_aiter_lines(customer_id, cursor), content_type='application/x-ndjson')
+        return set_validator_headers(response, validators)
+
+    if cursor is None and 'page_size' not in query.validated_data:
+        async def serialize():
+            # Same unordered query as the sync view, so rows come back in the same order
+            loans = _customer_loans_after(customer_id).order_by()
+            return [customer_loan_data(loan) async for loan in loans]
+
+        response = _json_response(await acached_data(validators, serialize), renderer=_fast_renderer)
+        return set_validator_headers(response, validators)
+
+    page_size = query.validated_data.get('page_size', settings.CUSTOMER_LOANS_PAGE_SIZE)
+
+    async def serialize_page():
+        loans = _customer_loans_after(customer_id, cursor)[:page_size + 1]
+        results = [customer_loan_data(loan) async for loan in loans]
+        next_cursor = results[page_size - 1]['loan_id'] if len(results) > page_size else None
+        return {'results': results[:page_size], 'next_cursor': next_cursor}
+
+    data = await acached_data(validators, serialize_page, variant=f'{cursor}:{page_size}')
+    next_cursor = data['next_cursor']
+    data = {
+        **data,
+        'next': replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor) if next_cursor is not None else None,
+    }
+    return set_validator_headers(_json_response(data, renderer=_fast_renderer), validators)
+
+
+async def _aiter_lines(customer_id, cursor):
+    loans = _customer_loans_after(customer_id, cursor).aiterator(chunk_size=settings.CUSTOMER_LOANS_PAGE_SIZE)
+    async for loan in loans:
+        yield json.dumps(customer_loan_data(loan)) + '\n'
@@ -0,0 +1,116 @@
+"""
+Customers' current debt: the total amount of their active loans, recomputed
+set-based in the database rather than customer by customer, and kept up to
+date daily by releasing only the loans that matured since the last run.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Customer, Loan, DebtMaintenanceRun
+from .scoring_cache import invalidate_credit_profiles
+
+
+DEBT_BATCH_SIZE = 1000
+
+
+def _loan_total_expression(loans):
+    """Correlated subquery: sum of the outer customer's loans in the queryset, 0 if none"""
+    loan_total = (
+        loans.filter(customer=OuterRef('pk'))
+        .order_by()
+        .values('customer')
+        .annotate(total=Sum('loan_amount'))
+        .values('total')
+    )
+    return Coalesce(
+        Subquery(loan_total),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def active_debt_expression(today=None):
+    """Correlated subquery: sum of the customer's loans that have not ended by today"""
+    return _loan_total_expression(Loan.objects.filter(end_date__gte=today or date.today()))
+
+
+def recompute_current_debt(customer_ids=None, batch_size=DEBT_BATCH_SIZE, today=None):
+    """
+    Set current_debt to the active loan total of the given customers (all when
+    None), updating only the current_debt column of rows whose value changed,
+    one short transaction per batch. Returns the number of customers updated.
+    """
+    active_debt = active_debt_expression(today)
+    customers = Customer.objects.all()
+    if customer_ids is not None:
+        customers = customers.filter(customer_id__in=customer_ids)
+    changed_ids = list(
+        customers.exclude(current_debt=active_debt)
+        .order_by('customer_id')
+        .values_list('customer_id', flat=True)
+    )
+
+    for start in range(0, len(changed_ids), batch_size):
+        batch = changed_ids[start:start + batch_size]
+        with transaction.atomic():
+            Customer.objects.filter(customer_id__in=batch).update(current_debt=active_debt)
+            invalidate_credit_profiles(batch)
+    return len(changed_ids)
+
+
+def last_debt_maintenance_date():
+    """Date as of which current debt was last brought up to date, or None"""
+    return DebtMaintenanceRun.objects.order_by('-as_of').values_list('as_of', flat=True).first()
+
+
+def reconcile_current_debt(today=None, batch_size=DEBT_BATCH_SIZE):
+    """
+    Recompute every customer's debt from scratch and record the date as the
+    new baseline for release_matured_debt. Returns the DebtMaintenanceRun,
+    whose customers_updated counts the customers whose debt had drifted.
+    """
+    today = today or date.today()
+    drifted_count = recompute_current_debt(batch_size=batch_size, today=today)
+    return DebtMaintenanceRun.objects.create(
+        kind=DebtMaintenanceRun.RECONCILE, as_of=today, customers_updated=drifted_count
+    )
+
+
+def release_matured_debt(today=None, batch_size=DEBT_BATCH_SIZE):
+    """
+    Subtract from current_debt the loans that matured since the last run, i.e.
+    ended on or after its date but before today, touching only their customers.
+    Without a previous run the debt is reconciled in full instead.
+    Returns the DebtMaintenanceRun recorded, or None if already up to date.
+    """
+    today = today or date.today()
+    last_date = last_debt_maintenance_date()
+    if last_date is None:
+        return reconcile_current_debt(today, batch_size)
+    if last_date >= today:
+        return None
+
+    matured_loans = Loan.objects.filter(end_date__gte=last_date, end_date__lt=today)
+    customer_ids = list(
+        matured_loans.order_by('customer_id').values_list('customer_id', flat=True).distinct()
+    )
+    matured_total = _loan_total_expression(matured_loans)
+
+    # One transaction, so the run record and the decrements commit together and
+    # the unique (matured, as_of) constraint stops a concurrent run from repeating them
+    with transaction.atomic():
+        run = DebtMaintenanceRun.objects.create(
+            kind=DebtMaintenanceRun.MATURED,
+            as_of=today,
+            loans_matured=matured_loans.count(),
+            customers_updated=len(customer_ids),
+        )
+        for start in range(0, len(customer_ids), batch_size):
+            batch = customer_ids[start:start + batch_size]
+            Customer.objects.filter(customer_id__in=batch).update(current_debt=F('current_debt') - matured_total)
+            invalidate_credit_profiles(batch)
+    return run
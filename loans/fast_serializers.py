@@ -0,0 +1,67 @@
+"""
+Plain serializers for the hot endpoints: build the response dicts straight
+from .values() rows instead of going through DRF's per-field machinery.
+Their output is identical to the ModelSerializers in serializers.py, which
+remain the reference definitions and are compared against in the tests.
+"""
+from decimal import Decimal
+
+
+CENTS = Decimal('0.01')
+
+LOAN_DETAIL_FIELDS = (
+    'loan_id', 'customer_id', 'customer__first_name', 'customer__last_name',
+    'customer__phone_number', 'customer__age', 'loan_amount', 'interest_rate',
+    'monthly_repayment', 'tenure',
+)
+CUSTOMER_LOAN_FIELDS = (
+    'loan_id', 'loan_amount', 'interest_rate', 'monthly_repayment', 'tenure', 'emis_paid_on_time',
+)
+
+
+def decimal_string(value):
+    """A money or rate value formatted like DRF's DecimalField(decimal_places=2)"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value).strip())
+    return format(value.quantize(CENTS), 'f')
+
+
+def loan_detail_data(row):
+    """LoanDetailSerializer output for a row of LOAN_DETAIL_FIELDS"""
+    return {
+        'loan_id': row['loan_id'],
+        'customer': {
+            'id': row['customer_id'],
+            'first_name': row['customer__first_name'],
+            'last_name': row['customer__last_name'],
+            'phone_number': row['customer__phone_number'],
+            'age': row['customer__age'],
+        },
+        'loan_amount': decimal_string(row['loan_amount']),
+        'interest_rate': decimal_string(row['interest_rate']),
+        'monthly_repayment': decimal_string(row['monthly_repayment']),
+        'tenure': row['tenure'],
+    }
+
+
+def customer_loan_data(row):
+    """CustomerLoanSerializer output for a row of CUSTOMER_LOAN_FIELDS"""
+    return {
+        'loan_id': row['loan_id'],
+        'loan_amount': decimal_string(row['loan_amount']),
+        'interest_rate': decimal_string(row['interest_rate']),
+        'monthly_installment': decimal_string(row['monthly_repayment']),
+        'repayments_left': max(0, row['tenure'] - row['emis_paid_on_time']),
+    }
+
+
+def customer_registration_data(customer):
+    """CustomerRegistrationResponseSerializer output for a newly saved customer"""
+    return {
+        'customer_id': customer.customer_id,
+        'name': f"{customer.first_name} {customer.last_name}",
+        'age': customer.age,
+        'monthly_income': decimal_string(customer.monthly_salary),
+        'approved_limit': decimal_string(customer.approved_limit),
+        'phone_number': customer.phone_number,
+    }
@@ -0,0 +1,118 @@
+"""
+Idempotency-Key support for create-loan. A request claims its key in a short
+transaction of its own, runs the view, then stores the response on the key,
+so retries of that request get it back without re-running eligibility or
+creating another loan. A duplicate that arrives while the claim is pending
+gets 409 instead of waiting. If the view raises or returns a 5xx response the
+claim is released; a claim left by a request that died mid-way lapses after
+IDEMPOTENCY_CLAIM_TIMEOUT seconds.
+"""
+import hashlib
+import json
+from collections.abc import Mapping
+from datetime import timedelta
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def request_fingerprint(data, fields=None):
+    """Hash of a request body, or of just its top-level fields named in fields"""
+    if fields is not None and isinstance(data, Mapping):
+        data = {field: data[field] for field in fields if field in data}
+    return hashlib.sha256(json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_data, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(view=None, *, fields=None):
+    """
+    Make a DRF view replay its stored response to requests repeating an
+    Idempotency-Key header. Requests without the header are unaffected.
+    With fields, only those body fields decide whether a retry is the same
+    request, so anything else (e.g. a re-issued token) may change between
+    attempts.
+    """
+    if view is None:
+        return partial(idempotent, fields=fields)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters long.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request.data, fields)
+        now = timezone.now()
+        claim_expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_CLAIM_TIMEOUT)
+        with transaction.atomic():
+            record, created = IdempotencyKey.objects.select_for_update().get_or_create(
+                key=key, defaults={'request_fingerprint': fingerprint, 'expires_at': claim_expires_at}
+            )
+            if not created:
+                if record.expires_at <= now:
+                    # An expired response, or a claim abandoned by a crashed request: start over
+                    record.request_fingerprint = fingerprint
+                    record.status_code = None
+                    record.response_data = None
+                    record.expires_at = claim_expires_at
+                    record.save()
+                elif record.request_fingerprint != fingerprint:
+                    return Response(
+                        {'detail': f'{IDEMPOTENCY_HEADER} was already used for a different request.'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                elif record.status_code is None:
+                    return Response(
+                        {'detail': f'A request with this {IDEMPOTENCY_HEADER} is still in progress.'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                else:
+                    return _replay(record)
+
+        # The view runs outside the claim's transaction, so it keeps its own
+        # transaction boundaries and the key's row lock is held only briefly
+        claim = IdempotencyKey.objects.filter(pk=record.pk, request_fingerprint=fingerprint, status_code__isnull=True)
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            claim.delete()
+            raise
+        if response.status_code >= 500:
+            # Let a retry run the request again rather than replay the failure
+            claim.delete()
+        else:
+            claim.update(
+                status_code=response.status_code,
+                response_data=response.data,
+                expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+        return response
+    return wrapper
+
+
+def purge_expired_idempotency_keys():
+    """Delete expired keys; returns how many were deleted"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,529 @@
+"""
+Building blocks for customer and loan data ingestion: streaming readers for
+Excel and CSV files, row parsers, chunked bulk upserts with a row-by-row
+fallback that quarantines bad rows, row fingerprints and checkpoints for
+incremental runs, and a PostgreSQL COPY fast path for CSV files.
+"""
+import csv
+import hashlib
+import os
+import re
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+import openpyxl
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+
+from .models import Customer, Loan, IngestionCheckpoint, IngestionFingerprint, QuarantinedRow
+from .scoring_cache import invalidate_credit_profiles
+from .summaries import rebuild_loan_summaries
+
+
+CUSTOMER_UPDATE_FIELDS = [
+    'first_name', 'last_name', 'age', 'phone_number', 'monthly_salary',
+    'approved_limit', 'updated_at'
+]
+LOAN_UPDATE_FIELDS = [
+    'customer', 'loan_amount', 'tenure', 'interest_rate', 'monthly_repayment',
+    'emis_paid_on_time', 'start_date', 'end_date', 'updated_at'
+]
+
+CUSTOMER_COLUMNS = [
+    'customer_id', 'first_name', 'last_name', 'age', 'phone_number', 'monthly_salary', 'approved_limit'
+]
+LOAN_COLUMNS = [
+    'customer_id', 'loan_id', 'loan_amount', 'tenure', 'interest_rate', 'monthly_repayment',
+    'emis_paid_on_time', 'start_date', 'end_date'
+]
+
+# Header spellings used by the source workbooks that differ from our column names
+HEADER_ALIASES = {
+    'monthly_payment': 'monthly_repayment',
+    'date_of_approval': 'start_date',
+}
+
+CUSTOMER_SOURCE = 'customer'
+LOAN_SOURCE = 'loan'
+SOURCE_MODELS = {
+    CUSTOMER_SOURCE: Customer,
+    LOAN_SOURCE: Loan,
+}
+
+# Errors raised by the row parsers for malformed values
+PARSE_ERRORS = (ValueError, TypeError, ArithmeticError)
+
+CSV_EXTENSIONS = ('.csv',)
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def normalize_header(name):
+    """Map a source header such as 'EMIs paid on Time' to a column name"""
+    normalized = re.sub(r'[^a-z0-9]+', '_', str(name or '').strip().lower()).strip('_')
+    return HEADER_ALIASES.get(normalized, normalized)
+
+
+def detect_format(file_path):
+    lowered = str(file_path).lower()
+    if lowered.endswith(CSV_EXTENSIONS):
+        return 'csv'
+    if lowered.endswith(EXCEL_EXTENSIONS):
+        return 'excel'
+    raise ValueError(f"Unsupported file format: {file_path}")
+
+
+def _check_columns(headers, required_columns, file_path):
+    missing = [column for column in required_columns if column not in headers]
+    if missing:
+        raise ValueError(f"{file_path} is missing columns: {', '.join(missing)}")
+
+
+def _iter_excel_rows(file_path, required_columns, start, stop):
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        headers = [normalize_header(name) for name in next(sheet.iter_rows(max_row=1, values_only=True), ())]
+        _check_columns(headers, required_columns, file_path)
+        # Data row n is sheet row n + 2; rows before start are skipped unparsed
+        max_row = stop + 1 if stop is not None else None
+        for row in sheet.iter_rows(min_row=start + 2, max_row=max_row, values_only=True):
+            yield dict(zip(headers, row))
+    finally:
+        workbook.close()
+
+
+def _iter_csv_rows(file_path, required_columns, start, stop):
+    with open(file_path, newline='', encoding='utf-8-sig') as csv_file:
+        reader = csv.reader(csv_file)
+        headers = [normalize_header(name) for name in next(reader, [])]
+        _check_columns(headers, required_columns, file_path)
+        # Skip raw rows before start without building dicts for them
+        for row in islice(reader, start, stop):
+            # Empty CSV cells are treated like empty Excel cells
+            yield {header: value if value != '' else None for header, value in zip(headers, row)}
+
+
+def _iter_rows(file_path, required_columns, start=0, stop=None):
+    if detect_format(file_path) == 'csv':
+        return _iter_csv_rows(file_path, required_columns, start, stop)
+    return _iter_excel_rows(file_path, required_columns, start, stop)
+
+
+def iter_row_chunks(file_path, chunk_size, required_columns, start=0, stop=None):
+    """
+    Stream data rows [start, stop) of an Excel or CSV file as dicts keyed by
+    normalized header, in lists of at most chunk_size, without loading the
+    whole file. Row numbers count data rows only, starting at 0. Rows before
+    start are skipped at the source, so shards do not parse each other's rows.
+    """
+    rows = _iter_rows(file_path, required_columns, start, stop)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def count_data_rows(file_path):
+    """Number of rows after the header, read without parsing values"""
+    if detect_format(file_path) == 'csv':
+        with open(file_path, newline='', encoding='utf-8-sig') as csv_file:
+            return max(sum(1 for _ in csv.reader(csv_file)) - 1, 0)
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return max(sum(1 for _ in workbook.active.iter_rows(values_only=True)) - 1, 0)
+    finally:
+        workbook.close()
+
+
+def estimate_data_rows(file_path):
+    """
+    Number of data rows for progress reporting. Workbooks use the dimensions
+    stored in the sheet when present rather than scanning every row.
+    """
+    if detect_format(file_path) == 'excel':
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+        finally:
+            workbook.close()
+        if max_row:
+            return max(max_row - 1, 0)
+    return count_data_rows(file_path)
+
+
+def shard_ranges(row_count, shard_size):
+    """Split row_count data rows into consecutive [start, stop) ranges"""
+    return [(start, min(start + shard_size, row_count)) for start in range(0, row_count, shard_size)]
+
+
+def _to_int(value):
+    return int(float(value))
+
+
+def _to_date(value):
+    if isinstance(value, str):
+        # Accept both plain dates and exported timestamps
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def parse_customer_row(row):
+    return Customer(
+        customer_id=_to_int(row['customer_id']),
+        first_name=row['first_name'],
+        last_name=row['last_name'],
+        age=_to_int(row['age']),
+        phone_number=str(row['phone_number']),
+        monthly_salary=Decimal(str(row['monthly_salary'])),
+        approved_limit=Decimal(str(row['approved_limit'])),
+        current_debt=Decimal('0')  # Set to 0 for new customers, recalculated from loans later
+    )
+
+
+def parse_loan_row(row):
+    return Loan(
+        loan_id=_to_int(row['loan_id']),
+        customer_id=_to_int(row['customer_id']),
+        loan_amount=Decimal(str(row['loan_amount'])),
+        tenure=_to_int(row['tenure']),
+        interest_rate=Decimal(str(row['interest_rate'])),
+        monthly_repayment=Decimal(str(row['monthly_repayment'])),
+        emis_paid_on_time=_to_int(row['emis_paid_on_time']) if row['emis_paid_on_time'] else 0,
+        start_date=_to_date(row['start_date']),
+        end_date=_to_date(row['end_date']),
+    )
+
+
+def upsert_customers(customers):
+    """
+    Insert or update a chunk of customers in one statement.
+    Returns (created_count, updated_count).
+    """
+    # ON CONFLICT cannot touch the same row twice, so the last occurrence wins
+    customers = list({customer.customer_id: customer for customer in customers}.values())
+    customer_ids = [customer.customer_id for customer in customers]
+
+    with transaction.atomic():
+        existing_count = Customer.objects.filter(customer_id__in=customer_ids).count()
+        Customer.objects.bulk_create(
+            customers,
+            update_conflicts=True,
+            unique_fields=['customer_id'],
+            update_fields=CUSTOMER_UPDATE_FIELDS,
+        )
+        invalidate_credit_profiles(customer_ids)
+
+    return len(customers) - existing_count, existing_count
+
+
+def loan_owners(loan_ids):
+    """Dict of loan_id -> customer_id for the loans that already exist"""
+    return dict(Loan.objects.filter(loan_id__in=loan_ids).values_list('loan_id', 'customer_id'))
+
+
+def upsert_loans(loans, refresh_summaries=True):
+    """
+    Insert or update a chunk of loans in one statement and, unless told
+    otherwise, refresh the loan summaries of the customers involved,
+    including the previous owners of loans moved to another customer.
+    Returns (created_count, updated_count).
+    """
+    loans = list({loan.loan_id: loan for loan in loans}.values())
+    loan_ids = [loan.loan_id for loan in loans]
+
+    with transaction.atomic():
+        previous_owners = loan_owners(loan_ids)
+        Loan.objects.bulk_create(
+            loans,
+            update_conflicts=True,
+            unique_fields=['loan_id'],
+            update_fields=LOAN_UPDATE_FIELDS,
+        )
+        if refresh_summaries:
+            rebuild_loan_summaries({loan.customer_id for loan in loans} | set(previous_owners.values()))
+
+    return len(loans) - len(previous_owners), len(previous_owners)
+
+
+# Incremental ingestion
+
+def row_fingerprint(record, columns):
+    """
+    Hash of a parsed row's column values. Values are hashed after parsing, so
+    the same row read from a workbook or a CSV file has the same fingerprint.
+    """
+    values = []
+    for column in columns:
+        value = getattr(record, column)
+        if isinstance(value, Decimal):
+            value = format(value.normalize(), 'f')  # 50000 and 50000.0 are the same amount
+        values.append(str(value))
+    return hashlib.sha1('\x1f'.join(values).encode()).hexdigest()
+
+
+def split_unchanged(source, records, columns):
+    """
+    Drop records whose fingerprint matches the stored one and which still exist.
+    Returns (changed_records, fingerprints of the changed records by id).
+    """
+    # The upsert keeps the last occurrence of an id, so that is the one to compare
+    records = list({record.pk: record for record in records}.values())
+    fingerprints = {record.pk: row_fingerprint(record, columns) for record in records}
+    stored = dict(
+        IngestionFingerprint.objects.filter(source=source, record_id__in=fingerprints)
+        .values_list('record_id', 'fingerprint')
+    )
+    matching_ids = [record_id for record_id, fingerprint in fingerprints.items() if stored.get(record_id) == fingerprint]
+    # A matching fingerprint is not enough if the record was deleted since
+    unchanged_ids = set(
+        SOURCE_MODELS[source].objects.filter(pk__in=matching_ids).values_list('pk', flat=True)
+    ) if matching_ids else set()
+
+    changed = [record for record in records if record.pk not in unchanged_ids]
+    return changed, {record.pk: fingerprints[record.pk] for record in changed}
+
+
+def store_fingerprints(source, fingerprints):
+    """Record the fingerprints (id -> hash) of rows just written"""
+    IngestionFingerprint.objects.bulk_create(
+        [
+            IngestionFingerprint(source=source, record_id=record_id, fingerprint=fingerprint)
+            for record_id, fingerprint in fingerprints.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['source', 'record_id'],
+        update_fields=['fingerprint'],
+    )
+
+
+def clear_fingerprints(source):
+    """Forget every fingerprint of a source, e.g. after rows were written without them"""
+    IngestionFingerprint.objects.filter(source=source).delete()
+
+
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def resume_position(source, file_path):
+    """
+    Data row to start an incremental run from: the rows committed by an
+    interrupted run over the same, unmodified file, otherwise 0
+    """
+    checkpoint = IngestionCheckpoint.objects.filter(source=source, file_path=os.path.abspath(file_path)).first()
+    if checkpoint is not None and checkpoint.file_signature == file_signature(file_path):
+        return checkpoint.rows_committed
+    return 0
+
+
+def save_checkpoint(source, file_path, rows_committed):
+    IngestionCheckpoint.objects.update_or_create(
+        source=source,
+        file_path=os.path.abspath(file_path),
+        defaults={'file_signature': file_signature(file_path), 'rows_committed': rows_committed},
+    )
+
+
+def clear_checkpoint(source, file_path):
+    IngestionCheckpoint.objects.filter(source=source, file_path=os.path.abspath(file_path)).delete()
+
+
+def upsert_with_fallback(records, upsert):
+    """
+    Upsert a chunk in a savepoint. If the database rejects it (e.g. a duplicate
+    phone number), roll back to the savepoint and retry the records one by one,
+    each in its own savepoint, so only the offending ones are left out.
+    Returns (created_count, updated_count, written_records, failures) where
+    failures is a list of (record, error).
+    """
+    try:
+        with transaction.atomic():
+            created_count, updated_count = upsert(records)
+        return created_count, updated_count, records, []
+    except DatabaseError:
+        pass
+
+    created_count = 0
+    updated_count = 0
+    written = []
+    failures = []
+    for record in records:
+        try:
+            with transaction.atomic():
+                created, updated = upsert([record])
+        except DatabaseError as error:
+            failures.append((record, error))
+            continue
+        created_count += created
+        updated_count += updated
+        written.append(record)
+    return created_count, updated_count, written, failures
+
+
+def quarantined_row(source, file_path, row_number, row, error, record_id=None):
+    """Unsaved QuarantinedRow for a source row dict or parsed record that failed"""
+    if not isinstance(row, dict):
+        row = {field.attname: getattr(row, field.attname) for field in row._meta.concrete_fields}
+    return QuarantinedRow(
+        source=source,
+        file_path=os.path.abspath(file_path),
+        row_number=row_number,
+        record_id=record_id,
+        data={key: None if value is None else str(value) for key, value in row.items() if key},
+        error=f"{type(error).__name__}: {error}",
+    )
+
+
+def reset_id_sequences():
+    """
+    Move the id sequences past explicitly inserted ids so that customers and
+    loans created through the API do not collide with ingested ones
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), [Customer, Loan])
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+# PostgreSQL COPY fast path
+
+def can_copy(file_path):
+    """Whether the file can be bulk loaded with COPY on the current database"""
+    return connection.vendor == 'postgresql' and detect_format(file_path) == 'csv'
+
+
+def _copy_into_staging(cursor, file_path, staging_table, required_columns):
+    """
+    Load a CSV file as-is into a text-only temporary table dropped at commit.
+    A serial _row column keeps file order so later rows win on duplicate ids.
+    """
+    with open(file_path, newline='', encoding='utf-8-sig') as csv_file:
+        headers = [normalize_header(name) for name in next(csv.reader(csv_file), [])]
+    _check_columns(headers, required_columns, file_path)
+
+    quote = connection.ops.quote_name
+    # Unused or repeated headers still need a staging column, but a unique name
+    column_names = [
+        header if header and header not in headers[:position] else f'_unused_{position}'
+        for position, header in enumerate(headers)
+    ]
+    columns = ', '.join(quote(name) for name in column_names)
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {staging_table} (_row bigserial, "
+        + ', '.join(f'{quote(name)} text' for name in column_names)
+        + ") ON COMMIT DROP"
+    )
+    with open(file_path, 'rb') as csv_file:
+        cursor.copy_expert(
+            f"COPY {staging_table} ({columns}) FROM STDIN WITH (FORMAT csv, HEADER true)", csv_file
+        )
+
+
+def copy_customers_csv(file_path):
+    """
+    Load a customer CSV with COPY into a staging table and merge it into
+    customers with one INSERT ... ON CONFLICT. Returns (created_count, updated_count).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _copy_into_staging(cursor, file_path, 'customers_staging', CUSTOMER_COLUMNS)
+        cursor.execute("""
+            WITH upserted AS (
+                INSERT INTO customers (
+                    customer_id, first_name, last_name, age, phone_number,
+                    monthly_salary, approved_limit, current_debt, created_at, updated_at
+                )
+                SELECT DISTINCT ON (customer_id::numeric::integer)
+                    customer_id::numeric::integer, first_name, last_name, age::numeric::integer, phone_number,
+                    monthly_salary::numeric, approved_limit::numeric, 0, now(), now()
+                FROM customers_staging
+                WHERE customer_id <> ''
+                ORDER BY customer_id::numeric::integer, _row DESC
+                ON CONFLICT (customer_id) DO UPDATE SET
+                    first_name = EXCLUDED.first_name,
+                    last_name = EXCLUDED.last_name,
+                    age = EXCLUDED.age,
+                    phone_number = EXCLUDED.phone_number,
+                    monthly_salary = EXCLUDED.monthly_salary,
+                    approved_limit = EXCLUDED.approved_limit,
+                    updated_at = EXCLUDED.updated_at
+                RETURNING customer_id, (xmax = 0) AS inserted
+            )
+            SELECT customer_id, inserted FROM upserted
+        """)
+        results = cursor.fetchall()
+        invalidate_credit_profiles([customer_id for customer_id, _ in results])
+        # Rows were written without fingerprints, so the next incremental run rehashes them all
+        clear_fingerprints(CUSTOMER_SOURCE)
+        reset_id_sequences()
+
+    created_count = sum(1 for _, inserted in results if inserted)
+    return created_count, len(results) - created_count
+
+
+def copy_loans_csv(file_path, chunk_size):
+    """
+    Load a loan CSV with COPY into a staging table and merge the rows whose
+    customer exists into loans with one INSERT ... ON CONFLICT.
+    Returns (created_count, updated_count, skipped_count).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _copy_into_staging(cursor, file_path, 'loans_staging', LOAN_COLUMNS)
+        cursor.execute("""
+            SELECT count(*) FROM loans_staging s
+            WHERE s.loan_id <> '' AND s.customer_id <> ''
+              AND NOT EXISTS (SELECT 1 FROM customers c WHERE c.customer_id = s.customer_id::numeric::integer)
+        """)
+        skipped_count = cursor.fetchone()[0]
+        # Loans moving to another customer leave their previous owner's summary
+        cursor.execute("""
+            SELECT DISTINCT l.customer_id FROM loans l
+            JOIN loans_staging s ON s.loan_id <> '' AND l.loan_id = s.loan_id::numeric::integer
+        """)
+        previous_owners = {customer_id for customer_id, in cursor.fetchall()}
+        cursor.execute("""
+            WITH upserted AS (
+                INSERT INTO loans (
+                    loan_id, customer_id, loan_amount, tenure, interest_rate, monthly_repayment,
+                    emis_paid_on_time, start_date, end_date, created_at, updated_at
+                )
+                SELECT DISTINCT ON (s.loan_id::numeric::integer)
+                    s.loan_id::numeric::integer, c.customer_id, s.loan_amount::numeric,
+                    trunc(s.tenure::numeric)::integer, s.interest_rate::numeric, s.monthly_repayment::numeric,
+                    COALESCE(trunc(NULLIF(s.emis_paid_on_time, '')::numeric)::integer, 0),
+                    s.start_date::timestamp::date, s.end_date::timestamp::date, now(), now()
+                FROM loans_staging s
+                JOIN customers c ON c.customer_id = s.customer_id::numeric::integer
+                WHERE s.loan_id <> '' AND s.customer_id <> ''
+                ORDER BY s.loan_id::numeric::integer, s._row DESC
+                ON CONFLICT (loan_id) DO UPDATE SET
+                    customer_id = EXCLUDED.customer_id,
+                    loan_amount = EXCLUDED.loan_amount,
+                    tenure = EXCLUDED.tenure,
+                    interest_rate = EXCLUDED.interest_rate,
+                    monthly_repayment = EXCLUDED.monthly_repayment,
+                    emis_paid_on_time = EXCLUDED.emis_paid_on_time,
+                    start_date = EXCLUDED.start_date,
+                    end_date = EXCLUDED.end_date,
+                    updated_at = EXCLUDED.updated_at
+                RETURNING customer_id, (xmax = 0) AS inserted
+            )
+            SELECT customer_id, inserted FROM upserted
+        """)
+        results = cursor.fetchall()
+        clear_fingerprints(LOAN_SOURCE)
+        reset_id_sequences()
+
+    customer_ids = sorted({customer_id for customer_id, _ in results} | previous_owners)
+    for start in range(0, len(customer_ids), chunk_size):
+        rebuild_loan_summaries(customer_ids[start:start + chunk_size])
+
+    created_count = sum(1 for _, inserted in results if inserted)
+    return created_count, len(results) - created_count, skipped_count
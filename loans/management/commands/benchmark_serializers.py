@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from loans.fast_serializers import CUSTOMER_LOAN_FIELDS, LOAN_DETAIL_FIELDS, customer_loan_data, loan_detail_data
+from loans.models import Loan
+from loans.renderers import FastJSONRenderer
+from loans.serializers import CustomerLoanSerializer, LoanDetailSerializer
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare per-object serialization and rendering cost of the ModelSerializers and the fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loans',
+            type=int,
+            help='Number of loans to serialize per run',
+            default=1000
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            help='Runs per measurement; the fastest is reported',
+            default=5
+        )
+
+    def handle(self, *args, **options):
+        loan_ids = list(Loan.objects.order_by('loan_id').values_list('loan_id', flat=True)[:options['loans']])
+        if not loan_ids:
+            raise CommandError('No loans to serialize; ingest some data first')
+        loans = Loan.objects.filter(loan_id__in=loan_ids).order_by('loan_id')
+        count = len(loan_ids)
+
+        cases = [
+            ('view-loan', [
+                ('ModelSerializer + JSONRenderer', JSONRenderer(),
+                 lambda: [LoanDetailSerializer(loan).data for loan in loans.select_related('customer')]),
+                ('values() + FastJSONRenderer', FastJSONRenderer(),
+                 lambda: [loan_detail_data(row) for row in loans.values(*LOAN_DETAIL_FIELDS)]),
+            ]),
+            ('view-loans', [
+                ('ModelSerializer + JSONRenderer', JSONRenderer(),
+                 lambda: CustomerLoanSerializer(loans.all(), many=True).data),
+                ('values() + FastJSONRenderer', FastJSONRenderer(),
+                 lambda: [customer_loan_data(row) for row in loans.values(*CUSTOMER_LOAN_FIELDS)]),
+            ]),
+        ]
+
+        self.stdout.write(f'Serializing {count} loans, best of {options["repeat"]} runs (query + serialize + render)')
+        for endpoint, variants in cases:
+            baseline = None
+            for label, renderer, serialize in variants:
+                seconds = min(self._time(renderer, serialize) for _ in range(options['repeat']))
+                per_object = seconds / count * 1e6
+                baseline = baseline or per_object
+                self.stdout.write(f'{endpoint:<10} {label:<32} {per_object:8.2f} µs/object  {baseline / per_object:5.1f}x')
+
+    def _time(self, renderer, serialize):
+        started = time.perf_counter()
+        renderer.render(serialize())
+        return time.perf_counter() - started
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from loans.portfolio import DEFAULT_CHUNK_SIZE
+from loans.snapshots import export_snapshot
+import time
+
+
+class Command(BaseCommand):
+    help = 'Export the customers and loans tables as a memory-mappable columnar NumPy snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Directory to write the snapshot to',
+            required=True
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows fetched from the database per chunk',
+            default=DEFAULT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        manifest = export_snapshot(options['output'], chunk_size=options['chunk_size'])
+        seconds = max(time.perf_counter() - started, 1e-9)
+
+        row_count = 0
+        for table, description in manifest['tables'].items():
+            row_count += description['rows']
+            self.stdout.write(f"Exported {description['rows']} {table} ({len(description['columns'])} columns)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot written to {options['output']} in {seconds:.2f}s ({row_count / seconds:,.0f} rows/sec)"
+        ))
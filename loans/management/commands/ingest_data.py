@@ -1,24 +1,50 @@
 from django.core.management.base import BaseCommand
-from loans.tasks import ingest_customer_data, ingest_loan_data, update_customer_current_debt
+from loans.progress import format_progress
+from loans.tasks import (
+    ingest_customer_data,
+    ingest_loan_data,
+    start_ingestion_workflow,
+    update_customer_current_debt
+)
 import os
 
 
 class Command(BaseCommand):
-    help = 'Ingest customer and loan data from Excel files'
+    help = 'Ingest customer and loan data from Excel or CSV files'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--customer-file',
             type=str,
-            help='Path to customer data Excel file',
+            help='Path to customer data Excel (.xlsx) or CSV file',
             default='data/customer_data.xlsx'
         )
         parser.add_argument(
             '--loan-file',
             type=str,
-            help='Path to loan data Excel file',
+            help='Path to loan data Excel (.xlsx) or CSV file',
             default='data/loan_data.xlsx'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows written per bulk upsert (defaults to the INGESTION_CHUNK_SIZE setting)',
+        )
+        parser.add_argument(
+            '--shard-size',
+            type=int,
+            help='Rows per parallel task with --async (defaults to the INGESTION_SHARD_SIZE setting)',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only write rows that changed since the last ingestion and, without --async, resume an interrupted run',
+        )
+        parser.add_argument(
+            '--progress',
+            action='store_true',
+            help='Print rows read, written and skipped, rows/sec and ETA after every chunk',
+        )
         parser.add_argument(
             '--async',
             action='store_true',
@@ -29,6 +55,9 @@ class Command(BaseCommand):
         customer_file = options['customer_file']
         loan_file = options['loan_file']
         run_async = options['async']
+        chunk_size = options['chunk_size']
+        incremental = options['incremental']
+        on_progress = self.show_progress if options['progress'] else None
 
         # Check if files exist
         if not os.path.exists(customer_file):
@@ -47,17 +76,12 @@ class Command(BaseCommand):
             # Run tasks asynchronously
             self.stdout.write('Starting asynchronous data ingestion...')
             
-            # Start customer data ingestion
-            customer_task = ingest_customer_data.delay(customer_file)
-            self.stdout.write(f'Customer data ingestion task started: {customer_task.id}')
-            
-            # Start loan data ingestion (should run after customer data)
-            loan_task = ingest_loan_data.delay(loan_file)
-            self.stdout.write(f'Loan data ingestion task started: {loan_task.id}')
-            
-            # Start current debt update
-            debt_task = update_customer_current_debt.delay()
-            self.stdout.write(f'Current debt update task started: {debt_task.id}')
+            # Customers load first, then loans; current debt is recomputed once at the end
+            workflow_id = start_ingestion_workflow(
+                customer_file, loan_file, chunk_size, options['shard_size'], incremental
+            )
+            self.stdout.write(f'Ingestion workflow started: {workflow_id}')
+            self.stdout.write(f'Track its progress at /ingestion/{workflow_id}/')
             
         else:
             # Run tasks synchronously
@@ -65,12 +89,12 @@ class Command(BaseCommand):
             
             # Ingest customer data
             self.stdout.write('Ingesting customer data...')
-            customer_result = ingest_customer_data(customer_file)
+            customer_result = ingest_customer_data(customer_file, chunk_size, incremental, on_progress)
             self.stdout.write(self.style.SUCCESS(customer_result))
             
             # Ingest loan data
             self.stdout.write('Ingesting loan data...')
-            loan_result = ingest_loan_data(loan_file)
+            loan_result = ingest_loan_data(loan_file, chunk_size, incremental, on_progress)
             self.stdout.write(self.style.SUCCESS(loan_result))
             
             # Update current debt
@@ -81,3 +105,6 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS('Data ingestion completed successfully!')
             )
+
+    def show_progress(self, snapshot):
+        self.stdout.write(format_progress(snapshot))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from loans.models import Customer
+from loans.summaries import REBUILD_BATCH_SIZE, rebuild_all_loan_summaries, rebuild_loan_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-customer loan summaries from the loans table and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer',
+            type=int,
+            nargs='+',
+            help='Only rebuild the summaries of these customer IDs',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Customers rebuilt per batch',
+            default=REBUILD_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if options['customer']:
+            customer_ids = set(options['customer'])
+            missing = customer_ids - set(
+                Customer.objects.filter(customer_id__in=customer_ids).values_list('customer_id', flat=True)
+            )
+            if missing:
+                raise CommandError(f'Customers not found: {", ".join(map(str, sorted(missing)))}')
+            rebuild_loan_summaries(customer_ids)
+            self.stdout.write(
+                self.style.SUCCESS(f'Rebuilt loan summaries for {len(options["customer"])} customers')
+            )
+            return
+
+        self.stdout.write('Rebuilding loan summaries for all customers...')
+        drifted_count = rebuild_all_loan_summaries(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Loan summaries rebuilt. {drifted_count} were missing or out of date')
+        )
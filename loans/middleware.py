@@ -0,0 +1,73 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .query_budget import repeated_query_shapes
+
+
+logger = logging.getLogger(__name__)
+
+
+class RepeatedQueryMiddleware:
+    """
+    DEBUG only: log the query shapes a request ran REPEATED_QUERY_THRESHOLD
+    or more times, which usually means a queryset is loaded once per row (N+1).
+    Async capable, so the async views run without a thread adapter and their
+    queries are recorded too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.REPEATED_QUERY_THRESHOLD
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        statements, record = self._recorder()
+        with connection.execute_wrapper(record):
+            response = self.get_response(request)
+        self._log_repeated(request, statements)
+        return response
+
+    async def __acall__(self, request):
+        # The async ORM runs queries through sync_to_async on the request's
+        # sync thread, whose connection is not the one of this event loop thread
+        statements, record = self._recorder()
+        await sync_to_async(self._add_wrapper)(record)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(self._remove_wrapper)(record)
+        self._log_repeated(request, statements)
+        return response
+
+    @staticmethod
+    def _recorder():
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+        return statements, record
+
+    @staticmethod
+    def _add_wrapper(record):
+        connection.execute_wrappers.append(record)
+
+    @staticmethod
+    def _remove_wrapper(record):
+        connection.execute_wrappers.remove(record)
+
+    def _log_repeated(self, request, statements):
+        for shape, count in repeated_query_shapes(statements, self.threshold):
+            logger.warning(f"Possible N+1 query in {request.method} {request.path}: ran {count} times: {shape}")
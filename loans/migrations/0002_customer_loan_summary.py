@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerLoanSummary',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='loan_summary', serialize=False, to='loans.customer')),
+                ('loan_count', models.IntegerField(default=0)),
+                ('total_tenure', models.IntegerField(default=0)),
+                ('total_paid_on_time', models.IntegerField(default=0)),
+                ('total_loan_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('active_emi_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('next_maturity_date', models.DateField(blank=True, null=True)),
+                ('loans_per_year', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'customer_loan_summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:38
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_customer_loan_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loan',
+            name='tenure',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(360)]),
+        ),
+    ]
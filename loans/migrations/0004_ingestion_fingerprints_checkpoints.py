@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0003_loan_tenure_max_360'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('customer', 'Customer'), ('loan', 'Loan')], max_length=20)),
+                ('file_path', models.CharField(max_length=500)),
+                ('file_signature', models.CharField(max_length=64)),
+                ('rows_committed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'ingestion_checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='IngestionFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('customer', 'Customer'), ('loan', 'Loan')], max_length=20)),
+                ('record_id', models.IntegerField()),
+                ('fingerprint', models.CharField(max_length=40)),
+            ],
+            options={
+                'db_table': 'ingestion_fingerprints',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ingestionfingerprint',
+            constraint=models.UniqueConstraint(fields=('source', 'record_id'), name='unique_ingestion_fingerprint'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingestioncheckpoint',
+            constraint=models.UniqueConstraint(fields=('source', 'file_path'), name='unique_ingestion_checkpoint'),
+        ),
+    ]
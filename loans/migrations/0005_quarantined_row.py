@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0004_ingestion_fingerprints_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuarantinedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('customer', 'Customer'), ('loan', 'Loan')], max_length=20)),
+                ('file_path', models.CharField(max_length=500)),
+                ('row_number', models.IntegerField()),
+                ('record_id', models.IntegerField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('error', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'ingestion_quarantine',
+                'ordering': ['-created_at', 'row_number'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0005_quarantined_row'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DebtMaintenanceRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('matured', 'Matured loans released'), ('reconcile', 'Full reconciliation')], max_length=20)),
+                ('as_of', models.DateField()),
+                ('loans_matured', models.IntegerField(default=0)),
+                ('customers_updated', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'debt_maintenance_runs',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='debtmaintenancerun',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'matured')), fields=('as_of',), name='unique_matured_debt_run'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 class Customer(models.Model):
@@ -25,7 +26,7 @@ class Loan(models.Model):
     loan_id = models.AutoField(primary_key=True)
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='loans')
     loan_amount = models.DecimalField(max_digits=12, decimal_places=2)
-    tenure = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(100)])
+    tenure = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(360)])
     interest_rate = models.DecimalField(max_digits=5, decimal_places=2)
     monthly_repayment = models.DecimalField(max_digits=12, decimal_places=2)
     emis_paid_on_time = models.IntegerField(default=0)
@@ -44,3 +45,154 @@ class Loan(models.Model):
 
     class Meta:
         db_table = 'loans'
+        indexes = [
+            # Keyset pagination of a customer's loans in loan_id order
+            models.Index(fields=['customer', 'loan_id'], name='loans_customer_loan_id_idx'),
+        ]
+
+
+class CustomerLoanSummary(models.Model):
+    """
+    Denormalized per-customer loan aggregates used by credit scoring and
+    eligibility, maintained incrementally as loans are written
+    """
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='loan_summary')
+    loan_count = models.IntegerField(default=0)
+    total_tenure = models.IntegerField(default=0)
+    total_paid_on_time = models.IntegerField(default=0)
+    total_loan_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    active_emi_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Earliest end_date among active loans; active_emi_sum is stale once it has passed
+    next_maturity_date = models.DateField(null=True, blank=True)
+    loans_per_year = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Loan summary for customer {self.customer_id}"
+
+    def is_stale(self, today):
+        """Whether a loan counted in active_emi_sum has matured since the last update"""
+        return self.next_maturity_date is not None and self.next_maturity_date < today
+
+    class Meta:
+        db_table = 'customer_loan_summaries'
+
+
+class IngestionFingerprint(models.Model):
+    """
+    Content hash of the last ingested version of a source row, used to skip
+    unchanged rows in incremental ingestion
+    """
+    SOURCE_CHOICES = [
+        ('customer', 'Customer'),
+        ('loan', 'Loan'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    record_id = models.IntegerField()
+    fingerprint = models.CharField(max_length=40)
+
+    def __str__(self):
+        return f"{self.source} {self.record_id}: {self.fingerprint}"
+
+    class Meta:
+        db_table = 'ingestion_fingerprints'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'record_id'], name='unique_ingestion_fingerprint'),
+        ]
+
+
+class IngestionCheckpoint(models.Model):
+    """
+    Data rows of a source file committed by an incremental ingestion run that
+    has not finished yet, so an interrupted run can resume after them
+    """
+    source = models.CharField(max_length=20, choices=IngestionFingerprint.SOURCE_CHOICES)
+    file_path = models.CharField(max_length=500)
+    # Size and modification time of the file; a different file starts over
+    file_signature = models.CharField(max_length=64)
+    rows_committed = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} {self.file_path}: {self.rows_committed} rows"
+
+    class Meta:
+        db_table = 'ingestion_checkpoints'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'file_path'], name='unique_ingestion_checkpoint'),
+        ]
+
+
+class QuarantinedRow(models.Model):
+    """
+    Source row left out of an ingestion because it could not be parsed or
+    was rejected by the database, kept with the error for review
+    """
+    source = models.CharField(max_length=20, choices=IngestionFingerprint.SOURCE_CHOICES)
+    file_path = models.CharField(max_length=500)
+    # Line in the source file, the header being line 1
+    row_number = models.IntegerField()
+    record_id = models.IntegerField(null=True, blank=True)
+    data = models.JSONField(default=dict)
+    error = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.source} row {self.row_number} of {self.file_path}"
+
+    class Meta:
+        db_table = 'ingestion_quarantine'
+        ordering = ['-created_at', 'row_number']
+
+
+class DebtMaintenanceRun(models.Model):
+    """
+    Date up to which customers' current debt has been brought up to date,
+    either by releasing matured loans or by a full reconciliation
+    """
+    MATURED = 'matured'
+    RECONCILE = 'reconcile'
+    KIND_CHOICES = [
+        (MATURED, 'Matured loans released'),
+        (RECONCILE, 'Full reconciliation'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    as_of = models.DateField()
+    loans_matured = models.IntegerField(default=0)
+    customers_updated = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} as of {self.as_of}"
+
+    class Meta:
+        db_table = 'debt_maintenance_runs'
+        constraints = [
+            # Matured loans of a day must never be subtracted twice
+            models.UniqueConstraint(
+                fields=['as_of'], condition=models.Q(kind='matured'), name='unique_matured_debt_run'
+            ),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response to a create-loan request sent with an Idempotency-Key header,
+    replayed to retries of the same request until it expires
+    """
+    key = models.CharField(max_length=255, unique=True)
+    # Hash of the request body, so a key reused for a different request is rejected
+    request_fingerprint = models.CharField(max_length=64)
+    # Empty while the request that claimed the key is still running
+    status_code = models.IntegerField(null=True, blank=True)
+    response_data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key {self.key}"
+
+    class Meta:
+        db_table = 'idempotency_keys'
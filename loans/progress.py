@@ -0,0 +1,160 @@
+"""
+Progress of ingestion runs: rows read, written, skipped and quarantined,
+throughput and ETA at chunk boundaries, published as Celery task state and
+read back by task or workflow id.
+"""
+import time
+
+from celery import states
+from celery.result import AsyncResult, GroupResult
+
+
+PROGRESS_STATE = 'PROGRESS'
+
+
+class IngestionProgress:
+    """
+    Row counters of one ingestion task. Every advance() hands a snapshot to
+    callback, e.g. a Celery update_state or a console renderer.
+    """
+
+    def __init__(self, stage, total_rows=None, callback=None, rows_read=0):
+        self.stage = stage
+        self.total_rows = total_rows
+        self.callback = callback
+        # A resumed run starts with the rows committed before the interruption
+        self.rows_read = rows_read
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.rows_unchanged = 0
+        self.rows_quarantined = 0
+        self._initial_rows_read = rows_read
+        self._started_at = time.monotonic()
+
+    def advance(self, read, written=0, skipped=0, unchanged=0, quarantined=0):
+        self.rows_read += read
+        self.rows_written += written
+        self.rows_skipped += skipped
+        self.rows_unchanged += unchanged
+        self.rows_quarantined += quarantined
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self._started_at
+        rows_per_second = (self.rows_read - self._initial_rows_read) / elapsed if elapsed > 0 else 0.0
+        return {
+            'stage': self.stage,
+            'rows_total': self.total_rows,
+            'rows_read': self.rows_read,
+            'rows_written': self.rows_written,
+            'rows_skipped': self.rows_skipped,
+            'rows_unchanged': self.rows_unchanged,
+            'rows_quarantined': self.rows_quarantined,
+            'elapsed_seconds': round(elapsed, 1),
+            'rows_per_second': round(rows_per_second, 1),
+            'eta_seconds': _eta(self.total_rows, self.rows_read, rows_per_second),
+        }
+
+
+def _eta(total_rows, rows_read, rows_per_second):
+    if total_rows is None or not rows_per_second:
+        return None
+    return round(max(total_rows - rows_read, 0) / rows_per_second, 1)
+
+
+def format_progress(snapshot):
+    """One console line for a progress snapshot"""
+    if snapshot['rows_total']:
+        read = f"{snapshot['rows_read']:,}/{snapshot['rows_total']:,} rows ({snapshot['rows_read'] / snapshot['rows_total']:.0%})"
+    else:
+        read = f"{snapshot['rows_read']:,} rows"
+    eta = f"{snapshot['eta_seconds']:.0f}s" if snapshot['eta_seconds'] is not None else '-'
+    return (
+        f"{snapshot['stage']}: {read}, written {snapshot['rows_written']:,}, "
+        f"skipped {snapshot['rows_skipped']:,}, unchanged {snapshot['rows_unchanged']:,}, "
+        f"quarantined {snapshot['rows_quarantined']:,} | "
+        f"{snapshot['rows_per_second']:,.0f} rows/s | ETA {eta}"
+    )
+
+
+def combine_snapshots(snapshots, running_snapshots=()):
+    """
+    Add up the snapshots of the shards of one stage. Throughput is the sum over
+    the shards still running, since those read in parallel; once none is
+    running it is the stage's average.
+    """
+    totals = [snapshot['rows_total'] for snapshot in snapshots]
+    rows_total = None if None in totals else sum(totals)
+    rows_read = sum(snapshot['rows_read'] for snapshot in snapshots)
+    elapsed = max(snapshot['elapsed_seconds'] for snapshot in snapshots)
+    if running_snapshots:
+        rows_per_second = sum(snapshot['rows_per_second'] for snapshot in running_snapshots)
+    else:
+        rows_per_second = rows_read / elapsed if elapsed else 0.0
+    return {
+        'stage': snapshots[0]['stage'],
+        'rows_total': rows_total,
+        'rows_read': rows_read,
+        'rows_written': sum(snapshot['rows_written'] for snapshot in snapshots),
+        'rows_skipped': sum(snapshot['rows_skipped'] for snapshot in snapshots),
+        'rows_unchanged': sum(snapshot['rows_unchanged'] for snapshot in snapshots),
+        'rows_quarantined': sum(snapshot['rows_quarantined'] for snapshot in snapshots),
+        'elapsed_seconds': elapsed,
+        'rows_per_second': round(rows_per_second, 1),
+        'eta_seconds': _eta(rows_total, rows_read, rows_per_second),
+    }
+
+
+def _task_snapshot(result):
+    """Latest snapshot of a task: its custom state while running, or the one in its result"""
+    if result.state == PROGRESS_STATE:
+        return result.info
+    if result.state == states.SUCCESS and isinstance(result.result, dict):
+        return result.result.get('progress')
+    return None
+
+
+def _error(result):
+    return str(result.result) if result.state == states.FAILURE else None
+
+
+def get_ingestion_status(task_id):
+    """
+    State and per-stage progress of an ingestion task, or of every task in a
+    parallel ingestion workflow saved as a group under task_id
+    """
+    workflow = GroupResult.restore(task_id)
+    results = workflow.results if workflow is not None else [AsyncResult(task_id)]
+
+    task_states = [result.state for result in results]
+    if states.FAILURE in task_states:
+        state = states.FAILURE
+    elif all(task_state == states.SUCCESS for task_state in task_states):
+        state = states.SUCCESS
+    elif any(task_state in (PROGRESS_STATE, states.STARTED, states.SUCCESS) for task_state in task_states):
+        state = PROGRESS_STATE
+    else:
+        state = states.PENDING
+
+    stages = {}
+    for result in results:
+        snapshot = _task_snapshot(result)
+        if snapshot is not None:
+            stages.setdefault(snapshot['stage'], []).append((snapshot, result.state == PROGRESS_STATE))
+    progress = {
+        stage: combine_snapshots(
+            [snapshot for snapshot, _ in entries],
+            [snapshot for snapshot, running in entries if running],
+        )
+        for stage, entries in stages.items()
+    }
+
+    last = results[-1]
+    return {
+        'task_id': task_id,
+        'state': state,
+        'progress': progress,
+        'result': last.result if last.state == states.SUCCESS else None,
+        'errors': [error for error in map(_error, results) if error],
+    }
@@ -0,0 +1,47 @@
+"""
+Query accounting for keeping hot paths at a constant query cost: a budget
+context manager for tests and benchmarks, and query-shape counting used to
+spot N+1 patterns, i.e. the same statement repeated once per row.
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+# IN lists grow with the number of ids, so their length is not part of the shape
+_PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """sql with its literals and placeholder lists collapsed"""
+    shape = _STRING.sub('?', sql)
+    shape = _PLACEHOLDER_LIST.sub('(...)', shape)
+    return _NUMBER.sub('?', shape)
+
+
+def repeated_query_shapes(statements, threshold):
+    """(shape, count) of the shapes run at least threshold times, most repeated first"""
+    counts = Counter(query_shape(sql) for sql in statements)
+    return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+
+@contextmanager
+def query_budget(budget, label='block', using=DEFAULT_DB_ALIAS):
+    """
+    Fail with QueryBudgetExceeded if the block runs more than budget queries.
+    Yields the CaptureQueriesContext, so callers can also read the exact count.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > budget:
+        statements = '\n'.join(f'  {query["sql"]}' for query in context.captured_queries)
+        raise QueryBudgetExceeded(f'{label} ran {len(context)} queries, budget is {budget}:\n{statements}')
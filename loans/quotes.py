@@ -0,0 +1,85 @@
+"""
+Signed eligibility quotes. check-eligibility hands out a short-lived token
+for an approved application, and create-loan can redeem it instead of
+rescoring, as long as the customer's eligibility inputs are still what they
+were when the quote was made. The token records them as a state version: a
+digest of every customer and loan summary value scoring reads.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+
+
+QUOTE_SALT = 'loans.quotes'
+
+
+def _canonical(value):
+    # Decimals read back from the database may differ in trailing zeros
+    return str(Decimal(value).normalize()) if isinstance(value, Decimal) else str(value)
+
+
+def loan_state_version(customer, stats):
+    """Digest of the customer and loan statistics values eligibility depends on"""
+    values = [
+        customer.approved_limit,
+        customer.current_debt or 0,
+        customer.monthly_salary,
+        stats['loan_count'],
+        stats['total_tenure'],
+        stats['total_paid_on_time'],
+        stats['current_year_loans'],
+        stats['total_loan_amount'],
+        stats['active_emi_sum'],
+        stats['next_maturity_date'],
+    ]
+    return hashlib.sha1(':'.join(map(_canonical, values)).encode()).hexdigest()
+
+
+def _application_values(customer_id, loan_amount, interest_rate, tenure):
+    return [customer_id, _canonical(Decimal(loan_amount)), _canonical(Decimal(interest_rate)), tenure]
+
+
+def issue_quote_token(application, eligibility_result):
+    """
+    Signed token for an approved check-eligibility result, None for rejections
+    and results without a state version
+    """
+    if not eligibility_result['eligible'] or not eligibility_result.get('state_version'):
+        return None
+    return signing.dumps(
+        {
+            'application': _application_values(
+                application['customer_id'], application['loan_amount'],
+                application['interest_rate'], application['tenure']
+            ),
+            'credit_score': eligibility_result['credit_score'],
+            'corrected_interest_rate': eligibility_result['corrected_interest_rate'],
+            'monthly_installment': eligibility_result['monthly_installment'],
+            'state_version': eligibility_result['state_version'],
+        },
+        salt=QUOTE_SALT,
+        compress=True
+    )
+
+
+def redeem_quote_token(token, customer_id, loan_amount, interest_rate, tenure):
+    """
+    The approved eligibility result stored in token, or None if the token is
+    invalid, expired or was issued for a different application
+    """
+    try:
+        quote = signing.loads(token, salt=QUOTE_SALT, max_age=settings.QUOTE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if quote['application'] != _application_values(customer_id, loan_amount, interest_rate, tenure):
+        return None
+    return {
+        'eligible': True,
+        'credit_score': quote['credit_score'],
+        'corrected_interest_rate': quote['corrected_interest_rate'],
+        'monthly_installment': quote['monthly_installment'],
+        'message': 'Loan approved',
+        'state_version': quote['state_version'],
+    }
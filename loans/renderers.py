@@ -0,0 +1,48 @@
+"""
+JSON renderer backed by orjson when it is installed, for the endpoints whose
+payloads hold only strings, ints, bools, None and Decimal strings. For those
+it produces the same bytes as DRF's JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders with orjson, handing the types it does not know (Decimal, lazy
+    strings, querysets, ...) and datetimes to DRF's encoder so they come out
+    the same. Falls back to the stock renderer without orjson, for indented
+    output, when ensure_ascii or non-compact JSON is configured, and for ints
+    beyond 64 bits, which orjson rejects.
+
+    Floats are not byte-compatible: orjson writes 1e-05 as 0.00001, 1e-07 as
+    1e-7 and 1e+16 as 1e16, and NaN as null instead of raising. So this is
+    not the default renderer; it is set per view on the endpoints built
+    from fast_serializers, which emit no floats.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, escape U+2028 and U+2029 to stay a strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,131 @@
+"""
+Conditional GET and response caching for the loan read endpoints. Validators
+(ETag and Last-Modified) come from the rows' updated_at in one cheap query, so
+repeat fetches get a 304 without serializing, and serialized bodies are cached
+under the validator they were built for, so any write that bumps updated_at
+(API, admin or bulk ingestion) makes the old entry unreachable.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Customer, Loan
+
+
+RESPONSE_KEY_PREFIX = 'loan_response'
+
+
+def _validators(kind, object_id, timestamps, *extra):
+    """(etag, last_modified) from the updated_at values a response depends on"""
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    version = ':'.join([kind, str(object_id), *(timestamp.isoformat() for timestamp in timestamps), *map(str, extra)])
+    return quote_etag(hashlib.md5(version.encode()).hexdigest()), max(timestamps)
+
+
+def _loan_versions(loan_id):
+    return Loan.objects.filter(loan_id=loan_id).values_list('updated_at', 'customer__updated_at')
+
+
+def _loan_validators(loan_id, versions):
+    return None if versions is None else _validators('loan', loan_id, versions)
+
+
+def loan_validators(loan_id):
+    """Validators of the view-loan response, None if the loan does not exist"""
+    return _loan_validators(loan_id, _loan_versions(loan_id).first())
+
+
+async def aloan_validators(loan_id):
+    return _loan_validators(loan_id, await _loan_versions(loan_id).afirst())
+
+
+def _customer_loans_versions(customer_id):
+    return (
+        Customer.objects.filter(customer_id=customer_id)
+        .annotate(loans_updated_at=Max('loans__updated_at'), loan_count=Count('loans'))
+        .values_list('updated_at', 'loans_updated_at', 'loan_count')
+    )
+
+
+def _customer_loans_validators(customer_id, versions):
+    # The loan count is part of the ETag so deleting a loan changes it too
+    if versions is None:
+        return None
+    updated_at, loans_updated_at, loan_count = versions
+    return _validators('customer_loans', customer_id, (updated_at, loans_updated_at), loan_count)
+
+
+def customer_loans_validators(customer_id):
+    """Validators of the view-loans response, None if the customer does not exist"""
+    return _customer_loans_validators(customer_id, _customer_loans_versions(customer_id).first())
+
+
+async def acustomer_loans_validators(customer_id):
+    return _customer_loans_validators(customer_id, await _customer_loans_versions(customer_id).afirst())
+
+
+def touch_customers(customer_ids):
+    """
+    Bump the customers' updated_at so the Last-Modified of their loan listing
+    advances when a loan is removed from it (deleted or moved to another customer)
+    """
+    Customer.objects.filter(customer_id__in=customer_ids).update(updated_at=timezone.now())
+
+
+def not_modified_response(request, validators):
+    """304 (or 412) if the client's conditional headers match the validators, else None"""
+    etag, last_modified = validators
+    return get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+
+
+def set_validator_headers(response, validators):
+    etag, last_modified = validators
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let browsers keep the body but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _response_key(validators, variant):
+    # variant tells apart the bodies of one resource, e.g. its pages
+    etag, _ = validators
+    return ':'.join([RESPONSE_KEY_PREFIX, etag.strip('"'), variant])
+
+
+def cached_data(validators, build_data, variant=''):
+    """The cached body for these validators, calling build_data() to serialize it on a miss"""
+    key = _response_key(validators, variant)
+    data = cache.get(key)
+    if data is None:
+        data = build_data()
+        cache.set(key, data, timeout=settings.LOAN_RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+async def acached_data(validators, build_data, variant=''):
+    """cached_data for async views, awaiting build_data() on a miss"""
+    key = _response_key(validators, variant)
+    data = await cache.aget(key)
+    if data is None:
+        data = await build_data()
+        await cache.aset(key, data, timeout=settings.LOAN_RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+def conditional_response(request, validators, build_data, variant=''):
+    """
+    304 if the client's If-None-Match / If-Modified-Since still matches the
+    validators, otherwise a 200 with the cached body for these validators
+    """
+    response = not_modified_response(request, validators)
+    if response is None:
+        response = Response(cached_data(validators, build_data, variant), status=status.HTTP_200_OK)
+    return set_validator_headers(response, validators)
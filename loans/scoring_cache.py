@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+PROFILE_KEY_PREFIX = 'credit_profile'
+HITS_KEY = 'credit_profile:hits'
+MISSES_KEY = 'credit_profile:misses'
+
+
+def _profile_key(customer_id, year=None):
+    # The current-year loan component changes on Jan 1, so the year is part of the key
+    if year is None:
+        year = datetime.now().year
+    return f'{PROFILE_KEY_PREFIX}:{year}:{customer_id}'
+
+
+def _profile_timeout(profile):
+    """
+    Seconds a profile may be cached: the configured timeout, cut short at the
+    next year boundary and at the day an active loan stops counting towards EMIs
+    """
+    now = datetime.now()
+    expires_at = datetime(now.year + 1, 1, 1)
+    if profile.get('next_maturity_date'):
+        expires_at = min(expires_at, datetime.combine(profile['next_maturity_date'] + timedelta(days=1), time.min))
+    seconds_left = int((expires_at - now).total_seconds())
+    return max(1, min(settings.CREDIT_SCORE_CACHE_TIMEOUT, seconds_left))
+
+
+def _count(key, amount):
+    if not amount:
+        return
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # Counter not created yet (or evicted)
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+async def _acount(key, amount):
+    try:
+        await cache.aincr(key, amount)
+    except ValueError:
+        if not await cache.aadd(key, amount, timeout=None):
+            await cache.aincr(key, amount)
+
+
+def get_cached_credit_profile(customer_id):
+    profile = cache.get(_profile_key(customer_id))
+    _count(HITS_KEY if profile is not None else MISSES_KEY, 1)
+    return profile
+
+
+async def aget_cached_credit_profile(customer_id):
+    profile = await cache.aget(_profile_key(customer_id))
+    await _acount(HITS_KEY if profile is not None else MISSES_KEY, 1)
+    return profile
+
+
+def get_cached_credit_profiles(customer_ids):
+    """Return a dict of customer_id -> profile for the ids found in the cache"""
+    keys = {_profile_key(customer_id): customer_id for customer_id in customer_ids}
+    found = cache.get_many(keys.keys())
+    _count(HITS_KEY, len(found))
+    _count(MISSES_KEY, len(keys) - len(found))
+    return {keys[key]: profile for key, profile in found.items()}
+
+
+def cache_credit_profile(customer_id, profile):
+    cache.set(_profile_key(customer_id), profile, timeout=_profile_timeout(profile))
+
+
+async def acache_credit_profile(customer_id, profile):
+    await cache.aset(_profile_key(customer_id), profile, timeout=_profile_timeout(profile))
+
+
+def cache_credit_profiles(profiles):
+    for customer_id, profile in profiles.items():
+        cache_credit_profile(customer_id, profile)
+
+
+def invalidate_credit_profiles(customer_ids):
+    """
+    Drop cached profiles of customers whose loans or debt changed. The delete is
+    repeated after the surrounding transaction commits so a concurrent read cannot
+    re-cache the pre-commit state.
+    """
+    keys = [_profile_key(customer_id) for customer_id in customer_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_credit_profile_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+    }
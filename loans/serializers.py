@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Customer, Loan
+from .models import Customer, Loan, CustomerLoanSummary
 
 
 class CustomerRegistrationSerializer(serializers.ModelSerializer):
@@ -14,7 +15,9 @@ class CustomerRegistrationSerializer(serializers.ModelSerializer):
         monthly_salary = validated_data['monthly_salary']
         approved_limit = round(36 * monthly_salary / 100000) * 100000  # Round to nearest lakh
         validated_data['approved_limit'] = approved_limit
-        return super().create(validated_data)
+        customer = super().create(validated_data)
+        CustomerLoanSummary.objects.create(customer=customer)
+        return customer
 
 
 class CustomerRegistrationResponseSerializer(serializers.ModelSerializer):
@@ -44,6 +47,26 @@ class LoanEligibilityResponseSerializer(serializers.Serializer):
     corrected_interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
     tenure = serializers.IntegerField()
     monthly_installment = serializers.DecimalField(max_digits=12, decimal_places=2)
+    quote_token = serializers.CharField(allow_null=True)
+
+
+class LoanQuoteGridSerializer(serializers.Serializer):
+    customer_id = serializers.IntegerField()
+    loan_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    tenures = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=50
+    )
+    interest_rates = serializers.ListField(
+        child=serializers.DecimalField(max_digits=5, decimal_places=2), min_length=1, max_length=50
+    )
+
+
+class MaxLoanOfferSerializer(serializers.Serializer):
+    customer_id = serializers.IntegerField()
+    interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
+    tenures = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=50
+    )
 
 
 class LoanCreateSerializer(serializers.Serializer):
@@ -51,6 +74,8 @@ class LoanCreateSerializer(serializers.Serializer):
     loan_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
     interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
     tenure = serializers.IntegerField()
+    # From an approved check-eligibility response for the same application
+    quote_token = serializers.CharField(required=False)
 
 
 class LoanCreateResponseSerializer(serializers.Serializer):
@@ -84,3 +109,10 @@ class CustomerLoanSerializer(serializers.ModelSerializer):
     class Meta:
         model = Loan
         fields = ['loan_id', 'loan_amount', 'interest_rate', 'monthly_installment', 'repayments_left']
+
+
+class CustomerLoansQuerySerializer(serializers.Serializer):
+    # Keyset pagination: the page holds the loans with loan_id greater than cursor
+    page_size = serializers.IntegerField(min_value=1, max_value=settings.CUSTOMER_LOANS_MAX_PAGE_SIZE, required=False)
+    cursor = serializers.IntegerField(min_value=0, required=False)
+    stream = serializers.BooleanField(required=False, default=False)
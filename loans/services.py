@@ -1,10 +1,34 @@
-from decimal import Decimal
+from decimal import Decimal, ROUND_DOWN
 from datetime import datetime, date
-from django.db.models import Sum, Count, Q
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import F
 from .models import Customer, Loan
+from .quotes import loan_state_version, redeem_quote_token
+from .summaries import add_loan_to_summary, get_loan_summary, get_loan_summaries
+from .scoring_cache import (
+    acache_credit_profile,
+    aget_cached_credit_profile,
+    cache_credit_profile,
+    cache_credit_profiles,
+    get_cached_credit_profile,
+    get_cached_credit_profiles
+)
 import math
 
 
+@lru_cache(maxsize=4096)
+def _compound_growth(annual_interest_rate, tenure_months):
+    """
+    Monthly rate r and growth factor (1 + r)^n, memoized since the same
+    (rate, tenure) pairs are priced over and over
+    """
+    monthly_rate = annual_interest_rate / (12 * 100)  # Convert annual % to monthly decimal
+    return monthly_rate, (1 + monthly_rate) ** tenure_months
+
+
 def calculate_monthly_installment(loan_amount, annual_interest_rate, tenure_months):
     """
     Calculate monthly installment using compound interest formula
@@ -13,37 +37,62 @@ def calculate_monthly_installment(loan_amount, annual_interest_rate, tenure_mont
     if annual_interest_rate == 0:
         return loan_amount / tenure_months
     
-    monthly_rate = annual_interest_rate / (12 * 100)  # Convert annual % to monthly decimal
+    monthly_rate, growth = _compound_growth(annual_interest_rate, tenure_months)
     
     # Calculate EMI using compound interest formula
-    numerator = loan_amount * monthly_rate * ((1 + monthly_rate) ** tenure_months)
-    denominator = ((1 + monthly_rate) ** tenure_months) - 1
+    numerator = loan_amount * monthly_rate * growth
+    denominator = growth - 1
     
     return numerator / denominator
 
 
-def calculate_credit_score(customer_id):
+def loan_statistics_from_summary(summary):
     """
-    Calculate credit score based on:
-    1. Past Loans paid on time (35% weight)
-    2. Number of loans taken in past (20% weight)
-    3. Loan activity in current year (20% weight)
-    4. Loan approved volume vs limit (25% weight)
+    Convert a CustomerLoanSummary into the statistics used for scoring
     """
-    try:
-        customer = Customer.objects.get(customer_id=customer_id)
-    except Customer.DoesNotExist:
-        return 0
-    
-    loans = Loan.objects.filter(customer=customer)
-    
-    if not loans.exists():
+    return {
+        'loan_count': summary.loan_count,
+        'total_tenure': summary.total_tenure,
+        'total_paid_on_time': summary.total_paid_on_time,
+        'current_year_loans': summary.loans_per_year.get(str(datetime.now().year), 0),
+        'total_loan_amount': summary.total_loan_amount,
+        'active_emi_sum': summary.active_emi_sum,
+        'next_maturity_date': summary.next_maturity_date,
+    }
+
+
+def get_loan_statistics(customer):
+    """
+    Collect every loan aggregate needed for scoring and eligibility from the
+    customer's denormalized loan summary
+    """
+    return loan_statistics_from_summary(get_loan_summary(customer))
+
+
+def get_loan_statistics_for_customers(customers):
+    """
+    Collect loan statistics for many customers loaded with
+    select_related('loan_summary'). Returns a dict of customer_id -> statistics.
+    """
+    summaries = get_loan_summaries(customers)
+    return {
+        customer_id: loan_statistics_from_summary(summary)
+        for customer_id, summary in summaries.items()
+    }
+
+
+def score_from_loan_statistics(customer, stats):
+    """
+    Calculate credit score from a loaded customer and its loan statistics
+    (see get_loan_statistics) without touching the database
+    """
+    if not stats['loan_count']:
         return 85  # New customer, give benefit of doubt
     
     # Component 1: Past loans paid on time (35% weight)
-    total_loans = loans.count()
-    total_emis = loans.aggregate(total=Sum('tenure'))['total'] or 0
-    total_paid_on_time = loans.aggregate(total=Sum('emis_paid_on_time'))['total'] or 0
+    total_loans = stats['loan_count']
+    total_emis = stats['total_tenure']
+    total_paid_on_time = stats['total_paid_on_time']
     
     on_time_score = (total_paid_on_time / max(total_emis, 1)) * 35
     
@@ -58,8 +107,7 @@ def calculate_credit_score(customer_id):
         loan_count_score = 5
     
     # Component 3: Loan activity in current year (20% weight)
-    current_year = datetime.now().year
-    current_year_loans = loans.filter(start_date__year=current_year).count()
+    current_year_loans = stats['current_year_loans']
     
     if current_year_loans == 0:
         current_year_score = 20
@@ -71,7 +119,7 @@ def calculate_credit_score(customer_id):
         current_year_score = 5
     
     # Component 4: Loan approved volume vs approved limit (25% weight)
-    total_loan_amount = loans.aggregate(total=Sum('loan_amount'))['total'] or 0
+    total_loan_amount = stats['total_loan_amount']
     if customer.approved_limit > 0:
         volume_ratio = float(total_loan_amount) / float(customer.approved_limit)
         if volume_ratio <= 0.5:
@@ -96,6 +144,129 @@ def calculate_credit_score(customer_id):
     return min(100, max(0, int(credit_score)))
 
 
+def build_credit_profile(customer, stats):
+    """
+    Everything eligibility needs to know about a customer, as a plain
+    cacheable dict
+    """
+    return {
+        'credit_score': score_from_loan_statistics(customer, stats),
+        'approved_limit': customer.approved_limit,
+        'current_debt': customer.current_debt,
+        'monthly_salary': customer.monthly_salary,
+        'active_emi_sum': stats['active_emi_sum'],
+        'next_maturity_date': stats['next_maturity_date'],
+        'state_version': loan_state_version(customer, stats),
+    }
+
+
+def get_credit_profile(customer_id):
+    """
+    Return the customer's credit profile from the cache, falling back to the
+    database. Returns None if the customer does not exist.
+    """
+    profile = get_cached_credit_profile(customer_id)
+    if profile is not None:
+        return profile
+    
+    try:
+        customer = Customer.objects.select_related('loan_summary').get(customer_id=customer_id)
+    except Customer.DoesNotExist:
+        return None
+    
+    profile = build_credit_profile(customer, get_loan_statistics(customer))
+    cache_credit_profile(customer_id, profile)
+    return profile
+
+
+async def aget_credit_profile(customer_id):
+    """
+    get_credit_profile for async views: the cache and the customer are read
+    without blocking the event loop. Only a missing or stale loan summary,
+    which has to be rebuilt in a transaction, goes through a worker thread.
+    """
+    profile = await aget_cached_credit_profile(customer_id)
+    if profile is not None:
+        return profile
+    
+    try:
+        customer = await Customer.objects.select_related('loan_summary').aget(customer_id=customer_id)
+    except Customer.DoesNotExist:
+        return None
+    
+    summary = getattr(customer, 'loan_summary', None)
+    if summary is None or summary.is_stale(date.today()):
+        stats = await sync_to_async(get_loan_statistics)(customer)
+    else:
+        stats = loan_statistics_from_summary(summary)
+    
+    profile = build_credit_profile(customer, stats)
+    await acache_credit_profile(customer_id, profile)
+    return profile
+
+
+def get_credit_profiles(customer_ids):
+    """
+    Return a dict of customer_id -> credit profile for the customers that exist,
+    loading cache misses from the database with a fixed number of queries
+    """
+    customer_ids = set(customer_ids)
+    profiles = get_cached_credit_profiles(customer_ids)
+    
+    missing_ids = customer_ids - profiles.keys()
+    if missing_ids:
+        customers = Customer.objects.select_related('loan_summary').in_bulk(missing_ids)
+        stats_by_customer = get_loan_statistics_for_customers(customers.values())
+        loaded = {
+            customer_id: build_credit_profile(customer, stats_by_customer[customer_id])
+            for customer_id, customer in customers.items()
+        }
+        cache_credit_profiles(loaded)
+        profiles.update(loaded)
+    
+    return profiles
+
+
+def calculate_credit_score(customer_id, customer=None, stats=None):
+    """
+    Calculate credit score based on:
+    1. Past Loans paid on time (35% weight)
+    2. Number of loans taken in past (20% weight)
+    3. Loan activity in current year (20% weight)
+    4. Loan approved volume vs limit (25% weight)
+    
+    An already loaded customer and/or loan statistics can be passed in
+    to avoid fetching them again; otherwise the cached profile is used.
+    """
+    if customer is None and stats is None:
+        profile = get_credit_profile(customer_id)
+        return profile['credit_score'] if profile else 0
+    
+    if customer is None:
+        try:
+            customer = Customer.objects.select_related('loan_summary').get(customer_id=customer_id)
+        except Customer.DoesNotExist:
+            return 0
+    
+    if stats is None:
+        stats = get_loan_statistics(customer)
+    
+    return score_from_loan_statistics(customer, stats)
+
+
+def calculate_credit_scores(customer_ids):
+    """
+    Calculate credit scores for many customers with a fixed number of queries.
+    Returns a dict of customer_id -> score; unknown customers score 0.
+    """
+    customer_ids = set(customer_ids)
+    profiles = get_credit_profiles(customer_ids)
+    return {
+        customer_id: profiles[customer_id]['credit_score'] if customer_id in profiles else 0
+        for customer_id in customer_ids
+    }
+
+
 def get_interest_rate_based_on_credit_score(credit_score, requested_rate):
     """
     Determine correct interest rate based on credit score
@@ -112,26 +283,54 @@ def get_interest_rate_based_on_credit_score(credit_score, requested_rate):
         return requested_rate, requested_rate  # Will be rejected anyway
 
 
+def _customer_not_found(interest_rate):
+    return {
+        'eligible': False,
+        'credit_score': 0,
+        'corrected_interest_rate': interest_rate,
+        'monthly_installment': 0,
+        'message': 'Customer not found'
+    }
+
+
+def _with_state_version(eligibility_result, profile):
+    # Profiles cached before state versions existed have none, and get no quote token
+    eligibility_result['state_version'] = profile.get('state_version')
+    return eligibility_result
+
+
 def check_loan_eligibility(customer_id, loan_amount, interest_rate, tenure):
     """
-    Check if customer is eligible for loan based on all criteria
+    Check if customer is eligible for loan based on all criteria. The result
+    carries the state_version of the profile it was evaluated against.
     """
-    try:
-        customer = Customer.objects.get(customer_id=customer_id)
-    except Customer.DoesNotExist:
-        return {
-            'eligible': False,
-            'credit_score': 0,
-            'corrected_interest_rate': interest_rate,
-            'monthly_installment': 0,
-            'message': 'Customer not found'
-        }
+    profile = get_credit_profile(customer_id)
+    if profile is None:
+        return _customer_not_found(interest_rate)
     
-    # Calculate credit score
-    credit_score = calculate_credit_score(customer_id)
+    return _with_state_version(evaluate_loan_eligibility(profile, loan_amount, interest_rate, tenure), profile)
+
+
+async def acheck_loan_eligibility(customer_id, loan_amount, interest_rate, tenure):
+    """
+    check_loan_eligibility for async views
+    """
+    profile = await aget_credit_profile(customer_id)
+    if profile is None:
+        return _customer_not_found(interest_rate)
+    
+    return _with_state_version(evaluate_loan_eligibility(profile, loan_amount, interest_rate, tenure), profile)
+
+
+def evaluate_loan_eligibility(profile, loan_amount, interest_rate, tenure):
+    """
+    Apply the eligibility rules to a customer's credit profile
+    (see build_credit_profile) without touching the database
+    """
+    credit_score = profile['credit_score']
     
     # Check if sum of current loans > approved limit
-    if customer.current_debt and customer.current_debt > customer.approved_limit:
+    if profile['current_debt'] and profile['current_debt'] > profile['approved_limit']:
         return {
             'eligible': False,
             'credit_score': 0,
@@ -161,13 +360,8 @@ def check_loan_eligibility(customer_id, loan_amount, interest_rate, tenure):
         }
     
     # Check if sum of all current EMIs > 50% of monthly salary
-    current_loans = Loan.objects.filter(
-        customer=customer,
-        end_date__gte=date.today()
-    )
-    
-    current_emi_sum = sum(float(loan.monthly_repayment) for loan in current_loans)
-    max_allowed_emi = float(customer.monthly_salary) * 0.5
+    current_emi_sum = float(profile['active_emi_sum'])
+    max_allowed_emi = float(profile['monthly_salary']) * 0.5
     
     if (current_emi_sum + monthly_installment) > max_allowed_emi:
         return {
@@ -185,3 +379,167 @@ def check_loan_eligibility(customer_id, loan_amount, interest_rate, tenure):
         'monthly_installment': monthly_installment,
         'message': 'Loan approved'
     }
+
+
+def create_loan_if_eligible(customer_id, loan_amount, interest_rate, tenure, quote_token=None):
+    """
+    Create the loan if the customer is eligible. Returns (eligibility_result, loan),
+    loan being None when the application is rejected.
+
+    A quote_token from check-eligibility for the same application stands in
+    for the eligibility checks while the customer's state version is unchanged;
+    otherwise the application is evaluated in full.
+
+    Eligibility is checked first against the cached credit profile, outside any
+    transaction, so rejections never take a lock. An approved application is
+    then re-checked and written in one short transaction holding only the
+    customer's row lock, so concurrent applications for one customer cannot
+    both spend the same headroom. Raises Customer.DoesNotExist if the customer
+    was deleted in between.
+    """
+    quote = redeem_quote_token(quote_token, customer_id, loan_amount, interest_rate, tenure) if quote_token else None
+    if quote is None:
+        eligibility_result = check_loan_eligibility(customer_id, loan_amount, interest_rate, tenure)
+        if not eligibility_result['eligible']:
+            return eligibility_result, None
+
+    start_date = date.today()
+    end_date = start_date + relativedelta(months=tenure)
+
+    with transaction.atomic():
+        customer = (
+            Customer.objects.select_for_update(of=('self',))
+            .select_related('loan_summary')
+            .get(customer_id=customer_id)
+        )
+        # Loan writes lock the customer first, so its debt and summary are current
+        stats = get_loan_statistics(customer)
+        if quote is not None and quote['state_version'] == loan_state_version(customer, stats):
+            eligibility_result = quote
+        else:
+            profile = build_credit_profile(customer, stats)
+            eligibility_result = evaluate_loan_eligibility(profile, loan_amount, interest_rate, tenure)
+            if not eligibility_result['eligible']:
+                return eligibility_result, None
+
+        loan = Loan.objects.create(
+            customer=customer,
+            loan_amount=loan_amount,
+            tenure=tenure,
+            interest_rate=Decimal(str(eligibility_result['corrected_interest_rate'])),
+            monthly_repayment=Decimal(str(eligibility_result['monthly_installment'])),
+            start_date=start_date,
+            end_date=end_date,
+            emis_paid_on_time=0
+        )
+
+        customer.current_debt = F('current_debt') + loan_amount
+        customer.save(update_fields=['current_debt', 'updated_at'])
+
+        add_loan_to_summary(loan)
+
+    return eligibility_result, loan
+
+
+def check_loan_eligibility_batch(applications):
+    """
+    Check eligibility for many applications at once. Each application is a dict
+    with customer_id, loan_amount, interest_rate and tenure; results are returned
+    in the same order, loading all customer profiles with a fixed number of queries.
+    """
+    profiles = get_credit_profiles(application['customer_id'] for application in applications)
+    
+    results = []
+    for application in applications:
+        profile = profiles.get(application['customer_id'])
+        if profile is None:
+            results.append(_customer_not_found(application['interest_rate']))
+            continue
+        
+        results.append(evaluate_loan_eligibility(
+            profile,
+            application['loan_amount'],
+            application['interest_rate'],
+            application['tenure']
+        ))
+    return results
+
+
+def quote_loan_grid(customer_id, loan_amount, tenures, interest_rates):
+    """
+    Evaluate one loan amount for every (tenure, interest rate) combination,
+    scoring the customer once. Returns a list of
+    (tenure, interest_rate, eligibility result) tuples, ordered by tenure then
+    rate, or None if the customer does not exist.
+    """
+    profile = get_credit_profile(customer_id)
+    if profile is None:
+        return None
+    
+    return [
+        (tenure, interest_rate, evaluate_loan_eligibility(profile, loan_amount, interest_rate, tenure))
+        for tenure in tenures
+        for interest_rate in interest_rates
+    ]
+
+
+MAX_LOAN_AMOUNT = Decimal('9999999999.99')  # Largest value a loan_amount field can hold
+
+
+def calculate_max_approvable_amounts(customer_id, interest_rate, tenures):
+    """
+    Find the largest loan amount the customer would be approved for at each
+    tenure by inverting the EMI formula against the 50%-of-salary EMI headroom,
+    scoring the customer once. Returns None if the customer does not exist.
+    """
+    profile = get_credit_profile(customer_id)
+    if profile is None:
+        return None
+    
+    _, corrected_rate = get_interest_rate_based_on_credit_score(profile['credit_score'], float(interest_rate))
+    headroom = float(profile['monthly_salary']) * 0.5 - float(profile['active_emi_sum'])
+    
+    # The same rules check_loan_eligibility rejects on regardless of amount
+    if profile['current_debt'] and profile['current_debt'] > profile['approved_limit']:
+        message = 'Current debt exceeds approved limit'
+    elif profile['credit_score'] <= 10:
+        message = 'Credit score too low'
+    elif headroom <= 0:
+        message = 'EMI exceeds 50% of monthly salary'
+    else:
+        message = None
+    
+    offers = []
+    for tenure in tenures:
+        max_amount = Decimal('0')
+        if message is None:
+            max_amount = _max_amount_for_tenure(profile, headroom, interest_rate, corrected_rate, tenure)
+        offers.append({
+            'tenure': tenure,
+            'max_loan_amount': max_amount,
+            'monthly_installment': calculate_monthly_installment(float(max_amount), corrected_rate, tenure),
+        })
+    
+    return {
+        'credit_score': profile['credit_score'],
+        'corrected_interest_rate': corrected_rate,
+        'offers': offers,
+        'message': message or 'Maximum approvable amounts calculated',
+    }
+
+
+def _max_amount_for_tenure(profile, headroom, interest_rate, corrected_rate, tenure):
+    """
+    Closed-form inverse of calculate_monthly_installment, rounded down to the
+    cent and nudged down if floating point puts it a hair over the limit
+    """
+    if corrected_rate == 0:
+        max_amount = headroom * tenure
+    else:
+        monthly_rate, growth = _compound_growth(corrected_rate, tenure)
+        max_amount = headroom * (growth - 1) / (monthly_rate * growth)
+    
+    amount = min(Decimal(max_amount).quantize(Decimal('0.01'), rounding=ROUND_DOWN), MAX_LOAN_AMOUNT)
+    while amount > 0 and not evaluate_loan_eligibility(profile, amount, interest_rate, tenure)['eligible']:
+        amount -= Decimal('0.01')
+    return amount
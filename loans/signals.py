@@ -0,0 +1,23 @@
+"""
+Signal receivers of the loans app, connected in LoansConfig.ready
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Customer
+from .scoring_cache import invalidate_credit_profiles
+
+
+# Customer fields copied into the cached credit profile
+PROFILE_FIELDS = {'monthly_salary', 'approved_limit', 'current_debt'}
+
+
+@receiver(post_save, sender=Customer)
+def invalidate_customer_credit_profile(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Drop the cached credit profile of a customer saved through the ORM or the
+    admin, so salary, limit and debt edits apply before the profile expires
+    """
+    if created or (update_fields is not None and not PROFILE_FIELDS & set(update_fields)):
+        return
+    invalidate_credit_profiles([instance.customer_id])
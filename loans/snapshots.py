@@ -0,0 +1,172 @@
+"""
+Columnar on-disk snapshots of the customer and loan tables for analytics.
+Each column is a NumPy .npy file that can be memory-mapped, so analysts can
+scan millions of rows without touching the OLTP database.
+"""
+import json
+import os
+import shutil
+from datetime import date
+from itertools import islice
+
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Customer, Loan
+from .portfolio import DEFAULT_CHUNK_SIZE, to_cents
+
+
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+EPOCH = date(1970, 1, 1)
+
+
+def _to_hundredths(rate):
+    # Interest rates have 2 decimal places, so hundredths of a percent are exact
+    return int((rate or 0) * 100)
+
+
+def _to_days(day):
+    return (day - EPOCH).days
+
+
+# (column, model field, dtype, converter) per table, in values_list order
+SNAPSHOT_TABLES = {
+    'customers': (Customer, 'customer_id', [
+        ('customer_id', 'customer_id', 'int64', int),
+        ('age', 'age', 'int64', int),
+        ('monthly_salary_cents', 'monthly_salary', 'int64', to_cents),
+        ('approved_limit_cents', 'approved_limit', 'int64', to_cents),
+        ('current_debt_cents', 'current_debt', 'int64', to_cents),
+    ]),
+    'loans': (Loan, 'loan_id', [
+        ('loan_id', 'loan_id', 'int64', int),
+        ('customer_id', 'customer_id', 'int64', int),
+        ('loan_amount_cents', 'loan_amount', 'int64', to_cents),
+        ('tenure', 'tenure', 'int64', int),
+        ('interest_rate_hundredths', 'interest_rate', 'int64', _to_hundredths),
+        ('monthly_repayment_cents', 'monthly_repayment', 'int64', to_cents),
+        ('emis_paid_on_time', 'emis_paid_on_time', 'int64', int),
+        ('start_date', 'start_date', 'datetime64[D]', _to_days),
+        ('end_date', 'end_date', 'datetime64[D]', _to_days),
+    ]),
+}
+
+
+def _export_table(model, order_by, columns, directory, table, chunk_size):
+    """
+    Stream a table through a server-side cursor, appending each chunk's raw
+    column bytes to part files, then wrap them as .npy files. Returns the row count.
+    """
+    paths = {name: os.path.join(directory, f'{table}.{name}') for name, _, _, _ in columns}
+    part_files = {name: open(f'{path}.part', 'wb') for name, path in paths.items()}
+    row_count = 0
+    try:
+        queryset = model.objects.order_by(order_by).values_list(*[field for _, field, _, _ in columns])
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            for position, (name, _, _, converter) in enumerate(columns):
+                values = np.fromiter((converter(row[position]) for row in batch), dtype=np.int64, count=len(batch))
+                part_files[name].write(values.tobytes())
+            row_count += len(batch)
+    finally:
+        for part_file in part_files.values():
+            part_file.close()
+
+    for name, _, dtype, _ in columns:
+        _write_npy(paths[name], dtype, row_count)
+    return row_count
+
+
+def _write_npy(path, dtype, row_count):
+    """Prefix the raw column bytes in path.part with an .npy header"""
+    header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (row_count,)}
+    with open(f'{path}.npy', 'wb') as npy_file, open(f'{path}.part', 'rb') as part_file:
+        np.lib.format.write_array_header_1_0(npy_file, header)
+        shutil.copyfileobj(part_file, npy_file)
+    os.remove(f'{path}.part')
+
+
+def export_snapshot(directory, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write the customers and loans tables to directory as one .npy file per
+    column, plus a manifest written last. Both tables are read in one
+    transaction, repeatable-read on PostgreSQL so they are mutually consistent.
+    Money is stored as int64 cents, rates as hundredths of a percent and dates
+    as datetime64[D]. Returns the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        # A snapshot is incomplete until its manifest is rewritten
+        os.remove(manifest_path)
+
+    tables = {}
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        for table, (model, order_by, columns) in SNAPSHOT_TABLES.items():
+            tables[table] = {
+                'rows': _export_table(model, order_by, columns, directory, table, chunk_size),
+                'columns': {name: dtype for name, _, dtype, _ in columns},
+            }
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'tables': tables,
+    }
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+def load_snapshot(directory):
+    """
+    Memory-map a snapshot written by export_snapshot. Returns
+    {'manifest': ..., 'customers': {column: array}, 'loans': {column: array}}
+    where the arrays are read-only views of the files, paged in on access.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No complete snapshot in {directory}: {MANIFEST_NAME} is missing")
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest['version']}")
+
+    snapshot = {'manifest': manifest}
+    for table, description in manifest['tables'].items():
+        snapshot[table] = {
+            name: np.load(os.path.join(directory, f'{table}.{name}.npy'), mmap_mode='r')
+            for name in description['columns']
+        }
+    return snapshot
+
+
+def snapshot_scoring_arrays(snapshot):
+    """
+    Customer and loan arrays from a snapshot in the layout expected by
+    portfolio.vectorized_credit_scores
+    """
+    customers = snapshot['customers']
+    loans = snapshot['loans']
+    return (
+        {
+            'customer_id': customers['customer_id'],
+            'approved_limit_cents': customers['approved_limit_cents'],
+            'current_debt_cents': customers['current_debt_cents'],
+        },
+        {
+            'customer_id': loans['customer_id'],
+            'tenure': loans['tenure'],
+            'emis_paid_on_time': loans['emis_paid_on_time'],
+            'loan_amount_cents': loans['loan_amount_cents'],
+            'start_year': loans['start_date'].astype('datetime64[Y]').astype(np.int64) + 1970,
+        },
+    )
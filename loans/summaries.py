@@ -0,0 +1,176 @@
+from datetime import date
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum, Count, Min, Q
+from django.db.models.functions import ExtractYear
+from .models import Customer, Loan, CustomerLoanSummary
+from .scoring_cache import invalidate_credit_profiles
+
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def compute_loan_summaries(customer_ids):
+    """
+    Aggregate the loans of the given customers into unsaved CustomerLoanSummary
+    objects using two GROUP BY customer_id queries
+    """
+    today = date.today()
+    customer_ids = set(customer_ids)
+    summaries = {
+        customer_id: CustomerLoanSummary(customer_id=customer_id, loans_per_year={})
+        for customer_id in customer_ids
+    }
+
+    rows = (
+        Loan.objects.filter(customer_id__in=customer_ids)
+        .values('customer_id')
+        .annotate(
+            loan_count=Count('loan_id'),
+            total_tenure=Sum('tenure'),
+            total_paid_on_time=Sum('emis_paid_on_time'),
+            total_loan_amount=Sum('loan_amount'),
+            active_emi_sum=Sum('monthly_repayment', filter=Q(end_date__gte=today)),
+            next_maturity_date=Min('end_date', filter=Q(end_date__gte=today)),
+        )
+        .order_by()
+    )
+    for row in rows:
+        summary = summaries[row['customer_id']]
+        summary.loan_count = row['loan_count']
+        summary.total_tenure = row['total_tenure'] or 0
+        summary.total_paid_on_time = row['total_paid_on_time'] or 0
+        summary.total_loan_amount = row['total_loan_amount'] or Decimal('0')
+        summary.active_emi_sum = row['active_emi_sum'] or Decimal('0')
+        summary.next_maturity_date = row['next_maturity_date']
+
+    year_rows = (
+        Loan.objects.filter(customer_id__in=customer_ids)
+        .annotate(year=ExtractYear('start_date'))
+        .values('customer_id', 'year')
+        .annotate(count=Count('loan_id'))
+        .order_by()
+    )
+    for row in year_rows:
+        summaries[row['customer_id']].loans_per_year[str(row['year'])] = row['count']
+
+    return summaries
+
+
+def rebuild_loan_summaries(customer_ids):
+    """
+    Recompute and store the summaries of the given customers from their loans.
+    Returns a dict of customer_id -> CustomerLoanSummary.
+    """
+    summaries = compute_loan_summaries(customer_ids)
+    CustomerLoanSummary.objects.bulk_create(
+        summaries.values(),
+        update_conflicts=True,
+        unique_fields=['customer'],
+        update_fields=[
+            'loan_count', 'total_tenure', 'total_paid_on_time', 'total_loan_amount',
+            'active_emi_sum', 'next_maturity_date', 'loans_per_year', 'updated_at'
+        ],
+    )
+    invalidate_credit_profiles(summaries.keys())
+    return summaries
+
+
+def rebuild_all_loan_summaries(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Rebuild the summaries of every customer in batches.
+    Returns the number of summaries whose stored values had drifted.
+    """
+    drifted_count = 0
+    customer_ids = Customer.objects.order_by('customer_id').values_list('customer_id', flat=True)
+    batch = []
+    for customer_id in customer_ids.iterator(chunk_size=batch_size):
+        batch.append(customer_id)
+        if len(batch) >= batch_size:
+            drifted_count += _rebuild_batch(batch)
+            batch = []
+    if batch:
+        drifted_count += _rebuild_batch(batch)
+    return drifted_count
+
+
+def _rebuild_batch(customer_ids):
+    existing = CustomerLoanSummary.objects.in_bulk(customer_ids)
+    with transaction.atomic():
+        summaries = rebuild_loan_summaries(customer_ids)
+    return sum(
+        1 for customer_id, summary in summaries.items()
+        if customer_id not in existing or _summary_values(existing[customer_id]) != _summary_values(summary)
+    )
+
+
+def _summary_values(summary):
+    return (
+        summary.loan_count,
+        summary.total_tenure,
+        summary.total_paid_on_time,
+        Decimal(summary.total_loan_amount),
+        Decimal(summary.active_emi_sum),
+        summary.next_maturity_date,
+        summary.loans_per_year,
+    )
+
+
+def get_loan_summary(customer):
+    """
+    Return the customer's loan summary, building it from the loans table
+    when it does not exist yet or an active loan has matured since it was stored
+    """
+    try:
+        summary = customer.loan_summary
+    except CustomerLoanSummary.DoesNotExist:
+        summary = None
+
+    if summary is None or summary.is_stale(date.today()):
+        summary = rebuild_loan_summaries([customer.customer_id])[customer.customer_id]
+    return summary
+
+
+def get_loan_summaries(customers):
+    """
+    Return a dict of customer_id -> loan summary for customers loaded with
+    select_related('loan_summary'), rebuilding missing or stale ones together
+    """
+    today = date.today()
+    summaries = {}
+    to_rebuild = []
+    for customer in customers:
+        summary = getattr(customer, 'loan_summary', None)
+        if summary is None or summary.is_stale(today):
+            to_rebuild.append(customer.customer_id)
+        else:
+            summaries[customer.customer_id] = summary
+
+    if to_rebuild:
+        summaries.update(rebuild_loan_summaries(to_rebuild))
+    return summaries
+
+
+def add_loan_to_summary(loan):
+    """
+    Incrementally account for a newly created loan in its customer's summary
+    """
+    with transaction.atomic():
+        summary = CustomerLoanSummary.objects.select_for_update().filter(customer_id=loan.customer_id).first()
+        if summary is None or summary.is_stale(date.today()):
+            # The loan is already saved, so a rebuild includes it
+            rebuild_loan_summaries([loan.customer_id])
+            return
+
+        summary.loan_count += 1
+        summary.total_tenure += loan.tenure
+        summary.total_paid_on_time += loan.emis_paid_on_time
+        summary.total_loan_amount += Decimal(loan.loan_amount)
+        year = str(loan.start_date.year)
+        summary.loans_per_year[year] = summary.loans_per_year.get(year, 0) + 1
+        if loan.end_date >= date.today():
+            summary.active_emi_sum += Decimal(loan.monthly_repayment)
+            if summary.next_maturity_date is None or loan.end_date < summary.next_maturity_date:
+                summary.next_maturity_date = loan.end_date
+        summary.save()
+        invalidate_credit_profiles([loan.customer_id])
@@ -1,132 +1,458 @@
-from celery import shared_task
-import openpyxl
-from decimal import Decimal
-from datetime import datetime
-from django.db import transaction
-from .models import Customer, Loan
+from celery import chord, shared_task
+from celery.result import GroupResult
+from celery.utils import uuid
+from functools import partial
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from .debt import reconcile_current_debt, release_matured_debt
+from .idempotency import purge_expired_idempotency_keys
+from .models import Customer, QuarantinedRow
+from .ingestion import (
+    CUSTOMER_COLUMNS,
+    CUSTOMER_SOURCE,
+    LOAN_COLUMNS,
+    LOAN_SOURCE,
+    PARSE_ERRORS,
+    can_copy,
+    clear_checkpoint,
+    copy_customers_csv,
+    copy_loans_csv,
+    count_data_rows,
+    estimate_data_rows,
+    iter_row_chunks,
+    loan_owners,
+    parse_customer_row,
+    parse_loan_row,
+    quarantined_row,
+    reset_id_sequences,
+    resume_position,
+    row_fingerprint,
+    save_checkpoint,
+    shard_ranges,
+    split_unchanged,
+    store_fingerprints,
+    upsert_customers,
+    upsert_loans,
+    upsert_with_fallback
+)
+from .progress import PROGRESS_STATE, IngestionProgress
+from .summaries import rebuild_loan_summaries
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task
-def ingest_customer_data(file_path):
+def _ingest_customer_rows(file_path, chunk_size, start=0, stop=None, incremental=False, checkpoint=False,
+                          progress=None):
     """
-    Background task to ingest customer data from Excel file
+    Upsert the customers in data rows [start, stop) of a file chunk by chunk,
+    recording row fingerprints. Rows that fail to parse or that the database
+    rejects are quarantined and the rest of the chunk is still written.
+    Incremental runs skip rows whose fingerprint is unchanged; with
+    checkpoint each chunk also commits the file position. Progress, if given,
+    is advanced after every chunk.
+    Returns (created_count, updated_count, unchanged_count, quarantined_count).
     """
-    try:
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
+    created_count = 0
+    updated_count = 0
+    unchanged_count = 0
+    quarantined_count = 0
+    position = start
+    
+    for rows in iter_row_chunks(file_path, chunk_size, CUSTOMER_COLUMNS, start, stop):
+        customers = []
+        row_numbers = {}
+        quarantine = []
+        for line, row in enumerate(rows, start=position + 2):  # Line 1 is the header
+            if not row['customer_id']:  # Check if customer_id exists
+                continue
+            try:
+                customer = parse_customer_row(row)
+            except PARSE_ERRORS as error:
+                quarantine.append(quarantined_row(CUSTOMER_SOURCE, file_path, line, row, error))
+                continue
+            customers.append(customer)
+            row_numbers[id(customer)] = line
+        position += len(rows)
+        parsed_count = len(customers)
+        created = updated = 0
+        
+        with transaction.atomic():
+            if incremental:
+                customers, fingerprints = split_unchanged(CUSTOMER_SOURCE, customers, CUSTOMER_COLUMNS)
+            else:
+                fingerprints = {customer.pk: row_fingerprint(customer, CUSTOMER_COLUMNS) for customer in customers}
+            if customers:
+                created, updated, written, failures = upsert_with_fallback(customers, upsert_customers)
+                store_fingerprints(CUSTOMER_SOURCE, {customer.pk: fingerprints[customer.pk] for customer in written})
+                quarantine.extend(
+                    quarantined_row(CUSTOMER_SOURCE, file_path, row_numbers[id(customer)], customer, error, customer.pk)
+                    for customer, error in failures
+                )
+            QuarantinedRow.objects.bulk_create(quarantine)
+            if checkpoint:
+                save_checkpoint(CUSTOMER_SOURCE, file_path, position)
         
-        created_count = 0
-        updated_count = 0
+        if quarantine:
+            logger.warning(f"Quarantined {len(quarantine)} customer rows of {file_path}")
+        unchanged = parsed_count - len(customers)
+        created_count += created
+        updated_count += updated
+        unchanged_count += unchanged
+        quarantined_count += len(quarantine)
+        if progress is not None:
+            progress.advance(len(rows), written=created + updated, unchanged=unchanged, quarantined=len(quarantine))
+    reset_id_sequences()
+    
+    return created_count, updated_count, unchanged_count, quarantined_count
+
+
+def _ingest_loan_rows(file_path, chunk_size, start=0, stop=None, refresh_summaries=True,
+                      incremental=False, checkpoint=False, progress=None):
+    """
+    Upsert the loans in data rows [start, stop) of a file chunk by chunk,
+    recording row fingerprints. Rows that fail to parse or that the database
+    rejects are quarantined and the rest of the chunk is still written.
+    Incremental runs skip rows whose fingerprint is unchanged; with
+    checkpoint each chunk also commits the file position. Progress, if given,
+    is advanced after every chunk.
+    Returns (created_count, updated_count, skipped_count, unchanged_count,
+    quarantined_count, customer_ids), customer_ids including the previous
+    owners of loans moved to another customer.
+    """
+    created_count = 0
+    updated_count = 0
+    skipped_count = 0
+    unchanged_count = 0
+    quarantined_count = 0
+    customer_ids = set()
+    known_customer_ids = set(Customer.objects.values_list('customer_id', flat=True))
+    upsert = partial(upsert_loans, refresh_summaries=refresh_summaries)
+    position = start
+    
+    for rows in iter_row_chunks(file_path, chunk_size, LOAN_COLUMNS, start, stop):
+        loans = []
+        row_numbers = {}
+        quarantine = []
+        skipped = 0
+        for line, row in enumerate(rows, start=position + 2):  # Line 1 is the header
+            if not (row['customer_id'] and row['loan_id']):  # Check if customer_id and loan_id exist
+                continue
+            try:
+                loan = parse_loan_row(row)
+            except PARSE_ERRORS as error:
+                quarantine.append(quarantined_row(LOAN_SOURCE, file_path, line, row, error))
+                continue
+            if loan.customer_id not in known_customer_ids:
+                logger.warning(f"Customer {loan.customer_id} not found for loan {loan.loan_id}")
+                skipped += 1
+                continue
+            loans.append(loan)
+            row_numbers[id(loan)] = line
+        position += len(rows)
+        parsed_count = len(loans)
+        created = updated = 0
         
         with transaction.atomic():
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if row[0]:  # Check if customer_id exists
-                    customer_id, first_name, last_name, age, phone_number, monthly_salary, approved_limit = row
-                    
-                    customer, created = Customer.objects.update_or_create(
-                        customer_id=customer_id,
-                        defaults={
-                            'first_name': first_name,
-                            'last_name': last_name,
-                            'age': age,
-                            'phone_number': str(phone_number),
-                            'monthly_salary': Decimal(str(monthly_salary)),
-                            'approved_limit': Decimal(str(approved_limit)),
-                            'current_debt': Decimal('0')  # Set to 0 initially, will calculate later
-                        }
-                    )
-                    
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
+            if incremental:
+                loans, fingerprints = split_unchanged(LOAN_SOURCE, loans, LOAN_COLUMNS)
+            else:
+                fingerprints = {loan.pk: row_fingerprint(loan, LOAN_COLUMNS) for loan in loans}
+            if loans:
+                # Summaries are refreshed by the caller, who also needs the customers losing a loan
+                previous_owners = {} if refresh_summaries else loan_owners([loan.pk for loan in loans])
+                created, updated, written, failures = upsert_with_fallback(loans, upsert)
+                customer_ids.update(loan.customer_id for loan in written)
+                customer_ids.update(previous_owners[loan.pk] for loan in written if loan.pk in previous_owners)
+                store_fingerprints(LOAN_SOURCE, {loan.pk: fingerprints[loan.pk] for loan in written})
+                quarantine.extend(
+                    quarantined_row(LOAN_SOURCE, file_path, row_numbers[id(loan)], loan, error, loan.pk)
+                    for loan, error in failures
+                )
+            QuarantinedRow.objects.bulk_create(quarantine)
+            if checkpoint:
+                save_checkpoint(LOAN_SOURCE, file_path, position)
         
-        logger.info(f"Customer data ingestion completed. Created: {created_count}, Updated: {updated_count}")
-        return f"Customer data ingestion completed. Created: {created_count}, Updated: {updated_count}"
+        if quarantine:
+            logger.warning(f"Quarantined {len(quarantine)} loan rows of {file_path}")
+        unchanged = parsed_count - len(loans)
+        created_count += created
+        updated_count += updated
+        skipped_count += skipped
+        unchanged_count += unchanged
+        quarantined_count += len(quarantine)
+        if progress is not None:
+            progress.advance(
+                len(rows), written=created + updated, skipped=skipped, unchanged=unchanged, quarantined=len(quarantine)
+            )
+    reset_id_sequences()
+    
+    return created_count, updated_count, skipped_count, unchanged_count, quarantined_count, customer_ids
+
+
+def _publish_progress(task):
+    """
+    Callback publishing progress snapshots as custom task state. Direct and
+    eager calls have no worker-side task state to update.
+    """
+    if task.request.called_directly or task.request.is_eager:
+        return None
+    return lambda snapshot: task.update_state(state=PROGRESS_STATE, meta=snapshot)
+
+
+def _copy_or_none(copy, file_path, *args):
+    """
+    Run a COPY fast path, or return None if the database rejects the file so the
+    caller can fall back to chunked upserts that quarantine the offending rows
+    """
+    try:
+        return copy(file_path, *args)
+    except DatabaseError as e:
+        logger.warning(f"COPY of {file_path} failed, ingesting it chunk by chunk instead: {str(e)}")
+        return None
+
+
+def _completion_message(message, incremental, unchanged_count, quarantined_count):
+    if incremental:
+        message += f", Unchanged: {unchanged_count}"
+    if quarantined_count:
+        message += f", Quarantined: {quarantined_count}"
+    return message
+
+
+@shared_task(bind=True)
+def ingest_customer_data(self, file_path, chunk_size=None, incremental=False, on_progress=None, raise_errors=False):
+    """
+    Background task to ingest customer data from an Excel or CSV file,
+    streaming the file and upserting customers in chunks. CSV files are
+    bulk loaded with COPY on PostgreSQL. Bad rows are quarantined instead of
+    failing the load. Incremental runs only write changed rows and resume an
+    interrupted run from its last committed chunk.
+    Progress is published as task state, or passed to on_progress when
+    called directly. Errors are reported in the returned message, or raised
+    with raise_errors so a workflow stops at the failed stage.
+    """
+    chunk_size = chunk_size or settings.INGESTION_CHUNK_SIZE
+    callback = on_progress or _publish_progress(self)
+    unchanged_count = quarantined_count = 0
+    try:
+        copied = None
+        if not incremental and can_copy(file_path):
+            copied = _copy_or_none(copy_customers_csv, file_path)
+        
+        if copied is not None:
+            created_count, updated_count = copied
+            progress = IngestionProgress('customers', callback=callback)
+            progress.advance(created_count + updated_count, written=created_count + updated_count)
+        elif incremental:
+            start = resume_position(CUSTOMER_SOURCE, file_path)
+            if start:
+                logger.info(f"Resuming customer data ingestion at row {start}")
+            progress = IngestionProgress('customers', estimate_data_rows(file_path), callback, rows_read=start)
+            created_count, updated_count, unchanged_count, quarantined_count = _ingest_customer_rows(
+                file_path, chunk_size, start, incremental=True, checkpoint=True, progress=progress
+            )
+            clear_checkpoint(CUSTOMER_SOURCE, file_path)
+        else:
+            progress = IngestionProgress('customers', estimate_data_rows(file_path), callback)
+            created_count, updated_count, _, quarantined_count = _ingest_customer_rows(
+                file_path, chunk_size, progress=progress
+            )
+        
+        message = _completion_message(
+            f"Customer data ingestion completed. Created: {created_count}, Updated: {updated_count}",
+            incremental, unchanged_count, quarantined_count
+        )
+        logger.info(message)
+        return message
         
     except Exception as e:
         logger.error(f"Error ingesting customer data: {str(e)}")
+        if raise_errors:
+            raise
         return f"Error ingesting customer data: {str(e)}"
 
 
-@shared_task
-def ingest_loan_data(file_path):
+@shared_task(bind=True)
+def ingest_loan_data(self, file_path, chunk_size=None, incremental=False, on_progress=None, raise_errors=False):
     """
-    Background task to ingest loan data from Excel file
+    Background task to ingest loan data from an Excel or CSV file,
+    streaming the file and upserting loans in chunks. CSV files are
+    bulk loaded with COPY on PostgreSQL. Bad rows are quarantined instead of
+    failing the load. Incremental runs only write changed rows and resume an
+    interrupted run from its last committed chunk.
+    Progress is published as task state, or passed to on_progress when
+    called directly. Errors are reported in the returned message, or raised
+    with raise_errors so a workflow stops at the failed stage.
     """
+    chunk_size = chunk_size or settings.INGESTION_CHUNK_SIZE
+    callback = on_progress or _publish_progress(self)
+    unchanged_count = quarantined_count = 0
     try:
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
+        copied = None
+        if not incremental and can_copy(file_path):
+            copied = _copy_or_none(copy_loans_csv, file_path, chunk_size)
         
-        created_count = 0
+        if copied is not None:
+            created_count, updated_count, skipped_count = copied
+            progress = IngestionProgress('loans', callback=callback)
+            progress.advance(
+                created_count + updated_count + skipped_count,
+                written=created_count + updated_count,
+                skipped=skipped_count
+            )
+        elif incremental:
+            start = resume_position(LOAN_SOURCE, file_path)
+            if start:
+                logger.info(f"Resuming loan data ingestion at row {start}")
+            progress = IngestionProgress('loans', estimate_data_rows(file_path), callback, rows_read=start)
+            created_count, updated_count, skipped_count, unchanged_count, quarantined_count, _ = _ingest_loan_rows(
+                file_path, chunk_size, start, incremental=True, checkpoint=True, progress=progress
+            )
+            clear_checkpoint(LOAN_SOURCE, file_path)
+        else:
+            progress = IngestionProgress('loans', estimate_data_rows(file_path), callback)
+            created_count, updated_count, skipped_count, _, quarantined_count, _ = _ingest_loan_rows(
+                file_path, chunk_size, progress=progress
+            )
         
-        with transaction.atomic():
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if row[0] and row[1]:  # Check if customer_id and loan_id exist
-                    customer_id, loan_id, loan_amount, tenure, interest_rate, monthly_repayment, emis_paid_on_time, start_date, end_date = row
-                    
-                    try:
-                        customer = Customer.objects.get(customer_id=customer_id)
-                        
-                        # Convert date strings to date objects if they're strings
-                        if isinstance(start_date, str):
-                            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                        if isinstance(end_date, str):
-                            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-                        
-                        loan, created = Loan.objects.update_or_create(
-                            loan_id=loan_id,
-                            defaults={
-                                'customer': customer,
-                                'loan_amount': Decimal(str(loan_amount)),
-                                'tenure': int(float(tenure)),
-                                'interest_rate': Decimal(str(interest_rate)),
-                                'monthly_repayment': Decimal(str(monthly_repayment)),
-                                'emis_paid_on_time': int(float(emis_paid_on_time) if emis_paid_on_time else 0),
-                                'start_date': start_date,
-                                'end_date': end_date,
-                            }
-                        )
-                        
-                        if created:
-                            created_count += 1
-                            
-                    except Customer.DoesNotExist:
-                        logger.warning(f"Customer {customer_id} not found for loan {loan_id}")
-                        continue
-        
-        logger.info(f"Loan data ingestion completed. Created: {created_count}")
-        return f"Loan data ingestion completed. Created: {created_count}"
+        message = _completion_message(
+            f"Loan data ingestion completed. Created: {created_count}, Updated: {updated_count}, Skipped: {skipped_count}",
+            incremental, unchanged_count, quarantined_count
+        )
+        logger.info(message)
+        return message
         
     except Exception as e:
         logger.error(f"Error ingesting loan data: {str(e)}")
+        if raise_errors:
+            raise
         return f"Error ingesting loan data: {str(e)}"
 
 
+@shared_task(bind=True)
+def ingest_customer_shard(self, file_path, start, stop, chunk_size=None, incremental=False):
+    """
+    Ingest one row range of a customer file as part of a parallel ingestion.
+    Errors are raised so the workflow stops before loans are loaded. Shards
+    write no checkpoints: an incremental workflow that fails is re-run whole,
+    with fingerprints skipping the rows already committed.
+    """
+    chunk_size = chunk_size or settings.INGESTION_CHUNK_SIZE
+    progress = IngestionProgress('customers', stop - start, _publish_progress(self))
+    created_count, updated_count, unchanged_count, quarantined_count = _ingest_customer_rows(
+        file_path, chunk_size, start, stop, incremental=incremental, progress=progress
+    )
+    logger.info(f"Customer rows {start}-{stop} ingested. Created: {created_count}, Updated: {updated_count}, Unchanged: {unchanged_count}, Quarantined: {quarantined_count}")
+    return {
+        'created': created_count,
+        'updated': updated_count,
+        'unchanged': unchanged_count,
+        'quarantined': quarantined_count,
+        'progress': progress.snapshot(),
+    }
+
+
+@shared_task(bind=True)
+def ingest_loan_shard(self, file_path, start, stop, chunk_size=None, incremental=False):
+    """
+    Ingest one row range of a loan file as part of a parallel ingestion.
+    Loan summaries are left to finalize_loan_ingestion, since shards touching
+    the same customer would otherwise race to rebuild its summary.
+    """
+    chunk_size = chunk_size or settings.INGESTION_CHUNK_SIZE
+    progress = IngestionProgress('loans', stop - start, _publish_progress(self))
+    created_count, updated_count, skipped_count, unchanged_count, quarantined_count, customer_ids = _ingest_loan_rows(
+        file_path, chunk_size, start, stop, refresh_summaries=False, incremental=incremental, progress=progress
+    )
+    logger.info(f"Loan rows {start}-{stop} ingested. Created: {created_count}, Updated: {updated_count}, Skipped: {skipped_count}, Unchanged: {unchanged_count}, Quarantined: {quarantined_count}")
+    return {
+        'created': created_count,
+        'updated': updated_count,
+        'skipped': skipped_count,
+        'unchanged': unchanged_count,
+        'quarantined': quarantined_count,
+        'customer_ids': sorted(customer_ids),
+        'progress': progress.snapshot(),
+    }
+
+
+@shared_task
+def finalize_loan_ingestion(shard_results, chunk_size=None):
+    """
+    Chord callback run once every loan shard has committed: rebuild the loan
+    summaries of the customers touched, then recompute current debt
+    """
+    chunk_size = chunk_size or settings.INGESTION_CHUNK_SIZE
+    # A whole-file COPY task reports a message instead of shard statistics
+    shard_results = [result for result in shard_results if isinstance(result, dict)]
+    customer_ids = sorted({customer_id for result in shard_results for customer_id in result['customer_ids']})
+    for start in range(0, len(customer_ids), chunk_size):
+        rebuild_loan_summaries(customer_ids[start:start + chunk_size])
+    
+    created_count = sum(result['created'] for result in shard_results)
+    updated_count = sum(result['updated'] for result in shard_results)
+    skipped_count = sum(result['skipped'] for result in shard_results)
+    unchanged_count = sum(result['unchanged'] for result in shard_results)
+    quarantined_count = sum(result['quarantined'] for result in shard_results)
+    logger.info(f"Loan data ingestion completed. Created: {created_count}, Updated: {updated_count}, Skipped: {skipped_count}, Unchanged: {unchanged_count}, Quarantined: {quarantined_count}")
+    
+    return update_customer_current_debt()
+
+
+def build_ingestion_workflow(customer_file, loan_file, chunk_size=None, shard_size=None, incremental=False):
+    """
+    Celery canvas for a parallel ingestion: customer shards run as a chord
+    header whose body is the loan shard chord, so no loan is read before every
+    customer has committed. Its callback finalizes summaries and recomputes
+    current debt once. CSV files that can be loaded with COPY are
+    handled by a single task instead of shards, unless the run is incremental.
+    """
+    shard_size = shard_size or settings.INGESTION_SHARD_SIZE
+    
+    if can_copy(customer_file) and not incremental:
+        customer_tasks = [ingest_customer_data.si(customer_file, chunk_size, raise_errors=True)]
+    else:
+        customer_tasks = [
+            ingest_customer_shard.si(customer_file, start, stop, chunk_size, incremental)
+            for start, stop in shard_ranges(count_data_rows(customer_file), shard_size)
+        ]
+    
+    if can_copy(loan_file) and not incremental:
+        loan_tasks = [ingest_loan_data.si(loan_file, chunk_size, raise_errors=True)]
+    else:
+        loan_tasks = [
+            ingest_loan_shard.si(loan_file, start, stop, chunk_size, incremental)
+            for start, stop in shard_ranges(count_data_rows(loan_file), shard_size)
+        ]
+    
+    return chord(customer_tasks, chord(loan_tasks, finalize_loan_ingestion.s(chunk_size)))
+
+
+def start_ingestion_workflow(customer_file, loan_file, chunk_size=None, shard_size=None, incremental=False):
+    """
+    Launch a parallel ingestion and save its tasks as a group, so that
+    /ingestion/<workflow_id>/ reports their combined progress.
+    Returns the workflow id.
+    """
+    workflow = build_ingestion_workflow(customer_file, loan_file, chunk_size, shard_size, incremental)
+    # Fix the task ids before sending so they can be tracked; freezing keeps existing ids
+    tasks = [*workflow.tasks, *workflow.body.tasks, workflow.body.body]
+    group_result = GroupResult(uuid(), [task.freeze() for task in tasks])
+    group_result.save()
+    workflow.apply_async()
+    return group_result.id
+
+
 @shared_task
 def update_customer_current_debt():
     """
-    Background task to update current debt for all customers based on active loans
+    Background task to update current debt for all customers based on active
+    loans, with a set-based UPDATE of the customers whose debt changed. The
+    run becomes the baseline for release_matured_loan_debt.
     """
     try:
-        customers = Customer.objects.all()
-        updated_count = 0
-        
-        with transaction.atomic():
-            for customer in customers:
-                # Calculate current debt from active loans
-                active_loans = Loan.objects.filter(
-                    customer=customer,
-                    end_date__gte=datetime.now().date()
-                )
-                
-                current_debt = sum(loan.loan_amount for loan in active_loans)
-                customer.current_debt = current_debt
-                customer.save()
-                updated_count += 1
+        updated_count = reconcile_current_debt().customers_updated
         
         logger.info(f"Updated current debt for {updated_count} customers")
         return f"Updated current debt for {updated_count} customers"
@@ -134,3 +460,49 @@ def update_customer_current_debt():
     except Exception as e:
         logger.error(f"Error updating current debt: {str(e)}")
         return f"Error updating current debt: {str(e)}"
+
+
+@shared_task
+def release_matured_loan_debt():
+    """
+    Scheduled daily: subtract the loans that matured since the last run from
+    their customers' current debt
+    """
+    try:
+        run = release_matured_debt()
+        if run is None:
+            return "Current debt already up to date"
+        
+        logger.info(f"Released {run.loans_matured} matured loans for {run.customers_updated} customers")
+        return f"Released {run.loans_matured} matured loans for {run.customers_updated} customers"
+        
+    except Exception as e:
+        logger.error(f"Error releasing matured loan debt: {str(e)}")
+        return f"Error releasing matured loan debt: {str(e)}"
+
+
+@shared_task
+def reconcile_customer_debt():
+    """
+    Scheduled weekly: recompute every customer's current debt from scratch
+    and report customers whose incrementally maintained debt had drifted
+    """
+    try:
+        drifted_count = reconcile_current_debt().customers_updated
+        if drifted_count:
+            logger.warning(f"Current debt had drifted for {drifted_count} customers")
+        return f"Reconciled current debt, {drifted_count} customers had drifted"
+        
+    except Exception as e:
+        logger.error(f"Error reconciling current debt: {str(e)}")
+        return f"Error reconciling current debt: {str(e)}"
+
+
+@shared_task
+def purge_idempotency_keys():
+    """
+    Scheduled hourly: delete create-loan idempotency keys past their TTL
+    """
+    deleted_count = purge_expired_idempotency_keys()
+    logger.info(f"Purged {deleted_count} expired idempotency keys")
+    return f"Purged {deleted_count} expired idempotency keys"
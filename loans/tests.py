@@ -1,10 +1,83 @@
-from django.test import TestCase
-from django.urls import reverse
-from rest_framework.test import APITestCase
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.http import HttpResponse
+from django.test.client import AsyncRequestFactory, RequestFactory
+from django.urls import get_resolver, reverse
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from collections import OrderedDict
 from decimal import Decimal
-from .models import Customer, Loan
-from .services import calculate_credit_score, calculate_monthly_installment
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+import openpyxl
+from unittest import mock, skipUnless
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from credit_approval.celery import app as celery_app
+from .models import (
+    Customer,
+    Loan,
+    CustomerLoanSummary,
+    DebtMaintenanceRun,
+    IdempotencyKey,
+    IngestionCheckpoint,
+    QuarantinedRow
+)
+from .ingestion import CUSTOMER_COLUMNS, CUSTOMER_SOURCE, iter_row_chunks, save_checkpoint, shard_ranges
+from .progress import combine_snapshots, format_progress
+from .tasks import (
+    build_ingestion_workflow,
+    finalize_loan_ingestion,
+    ingest_customer_data,
+    ingest_loan_data,
+    ingest_loan_shard,
+    purge_idempotency_keys
+)
+from .scoring_cache import _profile_key, _profile_timeout, get_credit_profile_cache_stats
+from .summaries import (
+    add_loan_to_summary,
+    compute_loan_summaries,
+    get_loan_summary,
+    rebuild_all_loan_summaries,
+    rebuild_loan_summaries
+)
+from .debt import recompute_current_debt, reconcile_current_debt, release_matured_debt
+from .portfolio import load_customer_arrays, load_loan_arrays, vectorized_credit_scores
+from .snapshots import export_snapshot, load_snapshot, snapshot_scoring_arrays
+from . import async_views, renderers, views
+from .middleware import RepeatedQueryMiddleware
+from .query_budget import QueryBudgetExceeded, query_budget, query_shape
+from .quotes import issue_quote_token, redeem_quote_token
+from .idempotency import request_fingerprint
+from .fast_serializers import (
+    CUSTOMER_LOAN_FIELDS,
+    LOAN_DETAIL_FIELDS,
+    customer_loan_data,
+    customer_registration_data,
+    loan_detail_data
+)
+from .renderers import FastJSONRenderer
+from .serializers import CustomerLoanSerializer, CustomerRegistrationResponseSerializer, LoanDetailSerializer
+from .services import (
+    calculate_credit_score,
+    calculate_credit_scores,
+    calculate_max_approvable_amounts,
+    calculate_monthly_installment,
+    check_loan_eligibility,
+    check_loan_eligibility_batch,
+    create_loan_if_eligible,
+    evaluate_loan_eligibility,
+    quote_loan_grid
+)
 
 
 class CustomerModelTest(TestCase):
@@ -53,6 +126,7 @@ class LoanModelTest(TestCase):
 
 class CreditScoringTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.customer = Customer.objects.create(
             first_name="John",
             last_name="Doe",
@@ -67,13 +141,613 @@ class CreditScoringTest(TestCase):
         score = calculate_credit_score(self.customer.customer_id)
         self.assertEqual(score, 85)
 
+    def test_credit_score_with_loan_history(self):
+        """Test credit score components computed from aggregated loan history"""
+        Loan.objects.create(
+            customer=self.customer,
+            loan_amount=Decimal('100000'),
+            tenure=12,
+            interest_rate=Decimal('10.0'),
+            monthly_repayment=Decimal('8791'),
+            start_date='2023-01-01',
+            end_date='2023-12-31',
+            emis_paid_on_time=6
+        )
+        # 6/12 on time -> 17.5, 1 loan -> 20, none this year -> 20, low volume -> 25
+        score = calculate_credit_score(self.customer.customer_id)
+        self.assertEqual(score, 82)
+
+    def test_eligibility_check_query_count(self):
+        """Test eligibility check reads customer and loan summary in one query"""
+        check_loan_eligibility(self.customer.customer_id, Decimal('100000'), Decimal('8.0'), 12)
+        cache.clear()
+        with self.assertNumQueries(1):
+            result = check_loan_eligibility(
+                self.customer.customer_id, Decimal('100000'), Decimal('8.0'), 12
+            )
+        self.assertTrue(result['eligible'])
+
+    def test_cached_eligibility_check_skips_database(self):
+        """Test repeated eligibility checks are served from the credit profile cache"""
+        check_loan_eligibility(self.customer.customer_id, Decimal('100000'), Decimal('8.0'), 12)
+        with self.assertNumQueries(0):
+            result = check_loan_eligibility(
+                self.customer.customer_id, Decimal('100000'), Decimal('8.0'), 12
+            )
+        self.assertTrue(result['eligible'])
+        self.assertEqual(get_credit_profile_cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_loan_write_invalidates_cached_score(self):
+        """Test adding a loan drops the customer's cached credit profile"""
+        self.assertEqual(calculate_credit_score(self.customer.customer_id), 85)
+        loan = Loan.objects.create(
+            customer=self.customer,
+            loan_amount=Decimal('100000'),
+            tenure=12,
+            interest_rate=Decimal('10.0'),
+            monthly_repayment=Decimal('8791'),
+            start_date=date(2023, 1, 1),
+            end_date=date(2023, 12, 31),
+            emis_paid_on_time=6
+        )
+        add_loan_to_summary(loan)
+        self.assertEqual(calculate_credit_score(self.customer.customer_id), 82)
+
+    def test_customer_save_invalidates_cached_profile(self):
+        """Test salary, limit and debt edits saved on the customer drop its cached profile"""
+        application = (self.customer.customer_id, Decimal('100000'), Decimal('8.0'), 12)
+        self.assertTrue(check_loan_eligibility(*application)['eligible'])
+        
+        self.customer.monthly_salary = Decimal('10000')
+        self.customer.save()
+        self.assertEqual(check_loan_eligibility(*application)['message'], 'EMI exceeds 50% of monthly salary')
+        
+        # Saves that leave the profile's fields alone keep it cached
+        self.customer.first_name = 'Jon'
+        self.customer.save(update_fields=['first_name'])
+        with self.assertNumQueries(0):
+            check_loan_eligibility(*application)
+
+    def test_cached_profile_expires_at_year_boundary(self):
+        """Test cached profiles never outlive the current year or the next loan maturity"""
+        profile = {'next_maturity_date': None}
+        self.assertLessEqual(
+            _profile_timeout(profile),
+            (datetime(datetime.now().year + 1, 1, 1) - datetime.now()).total_seconds() + 1
+        )
+        profile = {'next_maturity_date': date.today()}
+        self.assertLessEqual(_profile_timeout(profile), 24 * 60 * 60)
+        self.assertNotEqual(_profile_key(1, 2024), _profile_key(1, 2025))
+
+    def test_batch_credit_scores(self):
+        """Test grouped multi-customer scoring matches single-customer scoring"""
+        other = Customer.objects.create(
+            first_name="Jane",
+            last_name="Roe",
+            age=40,
+            phone_number="9876543210",
+            monthly_salary=Decimal('80000'),
+            approved_limit=Decimal('2900000')
+        )
+        Loan.objects.create(
+            customer=other,
+            loan_amount=Decimal('100000'),
+            tenure=12,
+            interest_rate=Decimal('10.0'),
+            monthly_repayment=Decimal('8791'),
+            start_date='2023-01-01',
+            end_date='2023-12-31',
+            emis_paid_on_time=6
+        )
+        customer_ids = [self.customer.customer_id, other.customer_id, 999999]
+        # Missing summaries are built together in a fixed number of queries
+        with self.assertNumQueries(4):
+            calculate_credit_scores(customer_ids)
+        # Known customers now come from the cache; only the unknown id hits the database
+        with self.assertNumQueries(1):
+            scores = calculate_credit_scores(customer_ids)
+        self.assertEqual(scores[self.customer.customer_id], calculate_credit_score(self.customer.customer_id))
+        self.assertEqual(scores[other.customer_id], calculate_credit_score(other.customer_id))
+        self.assertEqual(scores[999999], 0)
+
+    def test_vectorized_scores_match_scalar_scores(self):
+        """Test NumPy portfolio rescoring is identical to the scalar scoring path"""
+        current_year = date.today().year
+        customers = [self.customer]
+        for index in range(1, 8):
+            customers.append(Customer.objects.create(
+                first_name="Customer",
+                last_name=str(index),
+                age=30,
+                phone_number=f"555000{index:04d}",
+                monthly_salary=Decimal('40000'),
+                approved_limit=Decimal(str(300000 * index)),
+                current_debt=Decimal('2000000') if index == 7 else Decimal('0')
+            ))
+        for index, customer in enumerate(customers):
+            for number in range(index * 2):
+                Loan.objects.create(
+                    customer=customer,
+                    loan_amount=Decimal('100000.33'),
+                    tenure=12 + number,
+                    interest_rate=Decimal('10.0'),
+                    monthly_repayment=Decimal('8791'),
+                    start_date=date(current_year - (number % 3), 1, 1),
+                    end_date=date(current_year + 1, 1, 1),
+                    emis_paid_on_time=number * 3 % 13
+                )
+        
+        scores = vectorized_credit_scores(load_customer_arrays(chunk_size=3), load_loan_arrays(chunk_size=5))
+        customer_ids = load_customer_arrays()['customer_id'].tolist()
+        expected = [calculate_credit_score(customer_id) for customer_id in customer_ids]
+        self.assertEqual(scores.tolist(), expected)
+
+    def test_snapshot_export_round_trip(self):
+        """Test a columnar snapshot memory-maps back to the database's arrays and scores"""
+        other = Customer.objects.create(
+            first_name="Other",
+            last_name="Customer",
+            age=40,
+            phone_number="5550009999",
+            monthly_salary=Decimal('75000.50'),
+            approved_limit=Decimal('2700000'),
+            current_debt=Decimal('120000.25')
+        )
+        loan = Loan.objects.create(
+            customer=other,
+            loan_amount=Decimal('120000.25'),
+            tenure=24,
+            interest_rate=Decimal('11.75'),
+            monthly_repayment=Decimal('5622.10'),
+            start_date=date(2022, 3, 15),
+            end_date=date(2024, 3, 15),
+            emis_paid_on_time=20
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = export_snapshot(directory, chunk_size=1)
+            snapshot = load_snapshot(directory)
+
+            self.assertEqual(manifest['tables']['customers']['rows'], 2)
+            self.assertEqual(manifest['tables']['loans']['rows'], 1)
+            loans = snapshot['loans']
+            self.assertIsInstance(loans['loan_id'], np.memmap)
+            self.assertEqual(loans['loan_id'].tolist(), [loan.loan_id])
+            self.assertEqual(loans['interest_rate_hundredths'].tolist(), [1175])
+            self.assertEqual(loans['monthly_repayment_cents'].tolist(), [562210])
+            self.assertEqual(loans['end_date'].tolist(), [date(2024, 3, 15)])
+            self.assertEqual(snapshot['customers']['monthly_salary_cents'].tolist(), [5000000, 7500050])
+
+            customers, loan_arrays = snapshot_scoring_arrays(snapshot)
+            database_customers = load_customer_arrays()
+            for name, values in database_customers.items():
+                self.assertEqual(customers[name].tolist(), values.tolist())
+            database_loans = load_loan_arrays()
+            for name, values in database_loans.items():
+                self.assertEqual(loan_arrays[name].tolist(), values.tolist())
+            self.assertEqual(
+                vectorized_credit_scores(customers, loan_arrays).tolist(),
+                vectorized_credit_scores(database_customers, database_loans).tolist()
+            )
+
     def test_monthly_installment_calculation(self):
         """Test EMI calculation with compound interest"""
         emi = calculate_monthly_installment(100000, 10.0, 12)
         self.assertAlmostEqual(emi, 8791.59, places=2)
 
 
+class CustomerLoanSummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+
+    def create_loan(self, **kwargs):
+        values = {
+            'customer': self.customer,
+            'loan_amount': Decimal('100000'),
+            'tenure': 12,
+            'interest_rate': Decimal('10.0'),
+            'monthly_repayment': Decimal('8791'),
+            'start_date': date(2023, 1, 1),
+            'end_date': date(2023, 12, 31),
+            'emis_paid_on_time': 12,
+        }
+        values.update(kwargs)
+        return Loan.objects.create(**values)
+
+    def test_incremental_update_matches_rebuild(self):
+        """Test adding loans incrementally gives the same summary as a rebuild"""
+        self.create_loan()
+        rebuild_loan_summaries([self.customer.customer_id])
+        today = date.today()
+        for end_date in [today + timedelta(days=400), today + timedelta(days=30)]:
+            add_loan_to_summary(self.create_loan(start_date=today, end_date=end_date, emis_paid_on_time=0))
+        
+        summary = CustomerLoanSummary.objects.get(customer=self.customer)
+        expected = compute_loan_summaries([self.customer.customer_id])[self.customer.customer_id]
+        self.assertEqual(summary.loan_count, 3)
+        self.assertEqual(summary.total_tenure, expected.total_tenure)
+        self.assertEqual(summary.total_paid_on_time, expected.total_paid_on_time)
+        self.assertEqual(summary.total_loan_amount, expected.total_loan_amount)
+        self.assertEqual(summary.active_emi_sum, Decimal('17582'))
+        self.assertEqual(summary.next_maturity_date, today + timedelta(days=30))
+        self.assertEqual(summary.loans_per_year, expected.loans_per_year)
+
+    def test_matured_loan_marks_summary_stale(self):
+        """Test a summary is rebuilt once an active loan has matured"""
+        yesterday = date.today() - timedelta(days=1)
+        self.create_loan(end_date=yesterday)
+        # Simulate a summary stored while the loan was still active
+        CustomerLoanSummary.objects.create(
+            customer=self.customer,
+            loan_count=1,
+            total_tenure=12,
+            total_paid_on_time=12,
+            total_loan_amount=Decimal('100000'),
+            active_emi_sum=Decimal('8791'),
+            next_maturity_date=yesterday,
+            loans_per_year={'2023': 1}
+        )
+        
+        customer = Customer.objects.select_related('loan_summary').get(pk=self.customer.pk)
+        summary = get_loan_summary(customer)
+        self.assertEqual(summary.active_emi_sum, 0)
+        self.assertIsNone(summary.next_maturity_date)
+
+    def test_rebuild_all_reports_drift(self):
+        """Test full rebuild reconciles missing and drifted summaries"""
+        self.create_loan()
+        self.assertEqual(rebuild_all_loan_summaries(), 1)
+        self.assertEqual(rebuild_all_loan_summaries(), 0)
+        CustomerLoanSummary.objects.filter(customer=self.customer).update(loan_count=7)
+        self.assertEqual(rebuild_all_loan_summaries(batch_size=1), 1)
+        self.assertEqual(CustomerLoanSummary.objects.get(customer=self.customer).loan_count, 1)
+
+    def test_reassigned_loan_rebuilds_previous_owner_summary(self):
+        """Test a re-ingested loan moved to another customer leaves the previous owner's summary"""
+        other = Customer.objects.create(
+            first_name="Jane",
+            last_name="Roe",
+            age=40,
+            phone_number="9876543210",
+            monthly_salary=Decimal('80000'),
+            approved_limit=Decimal('2900000')
+        )
+        header = ('Customer ID', 'Loan ID', 'Loan Amount', 'Tenure', 'Interest Rate', 'Monthly payment',
+                  'EMIs paid on Time', 'Date of Approval', 'End Date')
+        loan = (101, 100000, 12, 10.0, 8791, 12, datetime(2021, 1, 1), datetime(2021, 12, 31))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'loans.xlsx')
+            for customer in (self.customer, other):
+                workbook = openpyxl.Workbook()
+                workbook.active.append(header)
+                workbook.active.append((customer.customer_id, *loan))
+                workbook.save(path)
+                ingest_loan_data(path)
+        self.assertEqual(CustomerLoanSummary.objects.get(customer=self.customer).loan_count, 0)
+        self.assertEqual(CustomerLoanSummary.objects.get(customer=other).loan_count, 1)
+        
+        with self.assertRaisesMessage(CommandError, 'Customers not found: 999999'):
+            call_command('rebuild_loan_summaries', '--customer', str(self.customer.customer_id), '999999')
+
+
+class DebtMaintenanceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+
+    def create_loan(self, **kwargs):
+        values = {
+            'customer': self.customer,
+            'loan_amount': Decimal('100000'),
+            'tenure': 12,
+            'interest_rate': Decimal('10.0'),
+            'monthly_repayment': Decimal('8791'),
+            'start_date': date(2023, 1, 1),
+            'end_date': date(2023, 12, 31),
+            'emis_paid_on_time': 12,
+        }
+        values.update(kwargs)
+        return Loan.objects.create(**values)
+
+    def test_current_debt_recomputed_set_based(self):
+        """Test current debt sums active loans and only rewrites customers whose debt changed"""
+        today = date.today()
+        self.create_loan(loan_amount=Decimal('250000'), start_date=today, end_date=today + timedelta(days=365))
+        self.create_loan(end_date=today)
+        self.create_loan(end_date=today - timedelta(days=1))
+        settled = Customer.objects.create(
+            first_name="Jane",
+            last_name="Roe",
+            age=40,
+            phone_number="9876543210",
+            monthly_salary=Decimal('80000'),
+            approved_limit=Decimal('2900000'),
+            current_debt=Decimal('5000')
+        )
+        
+        self.assertEqual(recompute_current_debt(batch_size=1), 2)
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).current_debt, Decimal('350000'))
+        self.assertEqual(Customer.objects.get(pk=settled.pk).current_debt, 0)
+        # Nothing changed since, so a single query finds nothing to update
+        with self.assertNumQueries(1):
+            self.assertEqual(recompute_current_debt(), 0)
+
+    def test_matured_loan_debt_released_incrementally(self):
+        """Test daily maintenance subtracts only loans matured since the last run"""
+        today = date.today()
+        self.create_loan(loan_amount=Decimal('100000'), start_date=today, end_date=today + timedelta(days=10))
+        self.create_loan(loan_amount=Decimal('200000'), start_date=today, end_date=today + timedelta(days=40))
+        
+        # The first run has no baseline, so it reconciles in full
+        run = release_matured_debt(today)
+        self.assertEqual(run.kind, DebtMaintenanceRun.RECONCILE)
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).current_debt, Decimal('300000'))
+        
+        run = release_matured_debt(today + timedelta(days=20))
+        self.assertEqual((run.kind, run.loans_matured, run.customers_updated), (DebtMaintenanceRun.MATURED, 1, 1))
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).current_debt, Decimal('200000'))
+        self.assertIsNone(release_matured_debt(today + timedelta(days=20)))
+        
+        # A reconciliation reports and repairs drift from the incremental path
+        Customer.objects.filter(pk=self.customer.pk).update(current_debt=Decimal('1'))
+        self.assertEqual(reconcile_current_debt(today + timedelta(days=20)).customers_updated, 1)
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).current_debt, Decimal('200000'))
+        release_matured_debt(today + timedelta(days=60))
+        self.assertEqual(Customer.objects.get(pk=self.customer.pk).current_debt, 0)
+
+
+class DataIngestionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write_workbook(self, name, header, rows):
+        path = os.path.join(self.temp_dir.name, name)
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+        return path
+
+    def customer_rows(self, count, salary=50000):
+        return [
+            (customer_id, 'First', f'Last{customer_id}', 30, 9000000000 + customer_id, salary, 1800000)
+            for customer_id in range(1, count + 1)
+        ]
+
+    def test_chunked_customer_and_loan_ingestion(self):
+        """Test workbooks are upserted chunk by chunk and unknown customers skipped"""
+        customer_header = ('Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number', 'Monthly Salary', 'Approved Limit')
+        customer_file = self.write_workbook('customers.xlsx', customer_header, self.customer_rows(5))
+        result = ingest_customer_data(customer_file, chunk_size=2)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 5, Updated: 0")
+        
+        customer_file = self.write_workbook('customers.xlsx', customer_header, self.customer_rows(6, salary=60000))
+        result = ingest_customer_data(customer_file, chunk_size=4)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 1, Updated: 5")
+        self.assertEqual(Customer.objects.get(customer_id=3).monthly_salary, Decimal('60000'))
+        
+        loan_header = ('Customer ID', 'Loan ID', 'Loan Amount', 'Tenure', 'Interest Rate', 'Monthly payment',
+                       'EMIs paid on Time', 'Date of Approval', 'End Date')
+        loan_rows = [
+            (1, 101, 100000, 12, 10.0, 8791, 12, datetime(2021, 1, 1), datetime(2021, 12, 31)),
+            (1, 102, 200000, 24, 12.0, 9439, 18, '2022-01-01', '2023-12-31'),
+            (2, 103, 150000, 18, 8.0, 9284, 18, datetime(2021, 6, 1), datetime(2022, 12, 31)),
+            (99, 104, 150000, 18, 8.0, 9284, 18, datetime(2021, 6, 1), datetime(2022, 12, 31)),
+        ]
+        loan_file = self.write_workbook('loans.xlsx', loan_header, loan_rows)
+        with self.assertLogs('loans.tasks', level='WARNING'):
+            result = ingest_loan_data(loan_file, chunk_size=2)
+        self.assertEqual(result, "Loan data ingestion completed. Created: 3, Updated: 0, Skipped: 1")
+        self.assertEqual(Loan.objects.get(loan_id=102).start_date, date(2022, 1, 1))
+        self.assertEqual(CustomerLoanSummary.objects.get(customer_id=1).loan_count, 2)
+
+    def test_incremental_ingestion_skips_unchanged_rows(self):
+        """Test incremental runs only write rows whose content changed"""
+        customer_header = ('Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number', 'Monthly Salary', 'Approved Limit')
+        rows = self.customer_rows(5)
+        customer_file = self.write_workbook('customers.xlsx', customer_header, rows)
+        ingest_customer_data(customer_file, chunk_size=2)
+        Customer.objects.filter(customer_id=1).update(current_debt=Decimal('1000'))
+        
+        rows[2] = rows[2][:5] + (65000,) + rows[2][6:]
+        customer_file = self.write_workbook('customers.xlsx', customer_header, rows + self.customer_rows(6)[5:])
+        result = ingest_customer_data(customer_file, chunk_size=2, incremental=True)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 1, Updated: 1, Unchanged: 4")
+        self.assertEqual(Customer.objects.get(customer_id=3).monthly_salary, Decimal('65000'))
+        self.assertEqual(Customer.objects.get(customer_id=1).current_debt, Decimal('1000'))
+        
+        # A deleted record is written again even though its fingerprint is unchanged
+        Customer.objects.filter(customer_id=6).delete()
+        result = ingest_customer_data(customer_file, chunk_size=2, incremental=True)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 1, Updated: 0, Unchanged: 5")
+
+    def test_incremental_ingestion_resumes_from_checkpoint(self):
+        """Test an interrupted incremental run resumes after its last committed chunk"""
+        customer_header = ('Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number', 'Monthly Salary', 'Approved Limit')
+        customer_file = self.write_workbook('customers.xlsx', customer_header, self.customer_rows(5))
+        save_checkpoint(CUSTOMER_SOURCE, customer_file, 4)
+        
+        result = ingest_customer_data(customer_file, chunk_size=2, incremental=True)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 1, Updated: 0, Unchanged: 0")
+        self.assertEqual(list(Customer.objects.values_list('customer_id', flat=True)), [5])
+        self.assertFalse(IngestionCheckpoint.objects.exists())
+        
+        # A checkpoint taken against another version of the file is ignored
+        save_checkpoint(CUSTOMER_SOURCE, customer_file, 4)
+        customer_file = self.write_workbook('customers.xlsx', customer_header, self.customer_rows(6))
+        IngestionCheckpoint.objects.update(file_signature='0:0')
+        result = ingest_customer_data(customer_file, chunk_size=2, incremental=True)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 5, Updated: 0, Unchanged: 1")
+
+    def test_bad_rows_quarantined(self):
+        """Test unparseable or rejected rows are quarantined while the rest of the chunk commits"""
+        customer_header = ('Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number', 'Monthly Salary', 'Approved Limit')
+        rows = self.customer_rows(5)
+        rows[1] = rows[1][:3] + ('thirty',) + rows[1][4:]
+        rows[3] = rows[3][:4] + (rows[0][4],) + rows[3][5:]  # Duplicate phone number
+        customer_file = self.write_workbook('customers.xlsx', customer_header, rows)
+        with self.assertLogs('loans.tasks', level='WARNING'):
+            result = ingest_customer_data(customer_file, chunk_size=5)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 3, Updated: 0, Quarantined: 2")
+        self.assertEqual(sorted(Customer.objects.values_list('customer_id', flat=True)), [1, 3, 5])
+        
+        quarantined = {row.row_number: row for row in QuarantinedRow.objects.all()}
+        self.assertEqual(sorted(quarantined), [3, 5])
+        self.assertEqual(quarantined[3].data['age'], 'thirty')
+        self.assertTrue(quarantined[3].error.startswith('ValueError'))
+        self.assertEqual(quarantined[5].record_id, 4)
+        self.assertTrue(quarantined[5].error.startswith('IntegrityError'))
+        
+        loan_header = ('Customer ID', 'Loan ID', 'Loan Amount', 'Tenure', 'Interest Rate', 'Monthly payment',
+                       'EMIs paid on Time', 'Date of Approval', 'End Date')
+        loan_rows = [
+            (1, 101, 100000, 12, 10.0, 8791, 12, '2021-01-01', '2021-12-31'),
+            (1, 102, 200000, 24, 12.0, 9439, 18, '2022-13-01', '2023-12-31'),
+        ]
+        loan_file = self.write_workbook('loans.xlsx', loan_header, loan_rows)
+        with self.assertLogs('loans.tasks', level='WARNING'):
+            result = ingest_loan_data(loan_file, chunk_size=2)
+        self.assertEqual(result, "Loan data ingestion completed. Created: 1, Updated: 0, Skipped: 0, Quarantined: 1")
+        self.assertEqual(QuarantinedRow.objects.filter(source='loan').get().row_number, 3)
+
+    def test_ingestion_progress_reported_per_chunk(self):
+        """Test ingestion reports rows read, written and skipped after every chunk"""
+        data_dir = os.path.join(settings.BASE_DIR, 'data')
+        snapshots = []
+        ingest_customer_data(os.path.join(data_dir, 'sample_customer_data.csv'), chunk_size=2, on_progress=snapshots.append)
+        
+        self.assertEqual([snapshot['rows_read'] for snapshot in snapshots], [2, 4, 5])
+        self.assertEqual(snapshots[-1]['stage'], 'customers')
+        self.assertEqual(snapshots[-1]['rows_total'], 5)
+        self.assertEqual(snapshots[-1]['rows_written'], 5)
+        self.assertIn('2/5 rows (40%)', format_progress(snapshots[0]))
+        
+        shard_snapshots = [
+            dict(snapshots[-1], rows_total=1000, rows_read=4, rows_per_second=100.0),
+            dict(snapshots[-1], rows_total=1000, rows_read=6, rows_per_second=50.0),
+        ]
+        combined = combine_snapshots(shard_snapshots, shard_snapshots)
+        self.assertEqual(combined['rows_read'], 10)
+        self.assertEqual(combined['rows_per_second'], 150.0)
+        self.assertEqual(combined['eta_seconds'], 13.3)
+
+    def test_shard_rows_skipped_at_source(self):
+        """Test a shard reads exactly its range of rows from a workbook or CSV"""
+        header = ('Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number', 'Monthly Salary', 'Approved Limit')
+        workbook = self.write_workbook('customers.xlsx', header, self.customer_rows(7))
+        csv_path = os.path.join(self.temp_dir.name, 'customers.csv')
+        with open(csv_path, 'w') as csv_file:
+            csv_file.write(','.join(header) + '\n')
+            for row in self.customer_rows(7):
+                csv_file.write(','.join(map(str, row)) + '\n')
+        
+        for path in (workbook, csv_path):
+            shards = [
+                [row for chunk in iter_row_chunks(path, 2, CUSTOMER_COLUMNS, start, stop) for row in chunk]
+                for start, stop in shard_ranges(7, 3)
+            ]
+            self.assertEqual([[int(row['customer_id']) for row in shard] for shard in shards], [[1, 2, 3], [4, 5, 6], [7]])
+
+    def test_parallel_ingestion_workflow(self):
+        """Test sharded ingestion loads customers before loans and recomputes debt once"""
+        data_dir = os.path.join(settings.BASE_DIR, 'data')
+        workflow = build_ingestion_workflow(
+            os.path.join(data_dir, 'sample_customer_data.csv'),
+            os.path.join(data_dir, 'sample_loan_data.csv'),
+            chunk_size=2,
+            shard_size=2
+        )
+        # Loans in the second stage would all be skipped if they ran before customers
+        self.assertEqual(len(workflow.tasks), 3)
+        self.assertEqual(len(workflow.body.tasks), 3)
+        self.assertEqual(workflow.body.body.name, 'loans.tasks.finalize_loan_ingestion')
+        
+        previous_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', previous_eager)
+        result = workflow.apply_async()
+        
+        # The sample loans have all ended, so every customer keeps a current debt of 0
+        self.assertEqual(result.get(), "Updated current debt for 0 customers")
+        self.assertEqual(Customer.objects.count(), 5)
+        self.assertEqual(Loan.objects.count(), 6)
+        self.assertEqual(CustomerLoanSummary.objects.get(customer_id=1).loan_count, 2)
+
+    def test_loan_shard_reports_previous_owners(self):
+        """Test a loan shard reports the customers losing a loan for the workflow's callback to rebuild"""
+        customer_header = ('Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number', 'Monthly Salary', 'Approved Limit')
+        ingest_customer_data(self.write_workbook('customers.xlsx', customer_header, self.customer_rows(2)))
+        loan_header = ('Customer ID', 'Loan ID', 'Loan Amount', 'Tenure', 'Interest Rate', 'Monthly payment',
+                       'EMIs paid on Time', 'Date of Approval', 'End Date')
+        loan = (101, 100000, 12, 10.0, 8791, 12, datetime(2021, 1, 1), datetime(2021, 12, 31))
+        ingest_loan_data(self.write_workbook('loans.xlsx', loan_header, [(1, *loan)]))
+        
+        shard_result = ingest_loan_shard(self.write_workbook('loans.xlsx', loan_header, [(2, *loan)]), 0, 1)
+        self.assertEqual(shard_result['customer_ids'], [1, 2])
+        finalize_loan_ingestion([shard_result])
+        self.assertEqual(CustomerLoanSummary.objects.get(customer_id=1).loan_count, 0)
+        self.assertEqual(CustomerLoanSummary.objects.get(customer_id=2).loan_count, 1)
+
+    def test_whole_file_workflow_stage_raises(self):
+        """Test a failed whole-file COPY stage fails the workflow instead of letting loans load"""
+        path = os.path.join(self.temp_dir.name, 'customers.csv')
+        with open(path, 'w') as csv_file:
+            csv_file.write('customer_id,first_name\n1,John\n')
+        with mock.patch('loans.tasks.can_copy', return_value=True):
+            workflow = build_ingestion_workflow(path, path)
+        self.assertEqual(workflow.tasks[0].kwargs, {'raise_errors': True})
+        self.assertEqual(workflow.body.tasks[0].kwargs, {'raise_errors': True})
+        
+        with self.assertLogs('loans.tasks', level='ERROR'), self.assertRaises(ValueError):
+            ingest_customer_data(path, raise_errors=True)
+
+    def test_csv_ingestion(self):
+        """Test the sample CSV files ingest through the same pipeline as workbooks"""
+        data_dir = os.path.join(settings.BASE_DIR, 'data')
+        result = ingest_customer_data(os.path.join(data_dir, 'sample_customer_data.csv'), chunk_size=2)
+        self.assertEqual(result, "Customer data ingestion completed. Created: 5, Updated: 0")
+        result = ingest_loan_data(os.path.join(data_dir, 'sample_loan_data.csv'), chunk_size=4)
+        self.assertEqual(result, "Loan data ingestion completed. Created: 6, Updated: 0, Skipped: 0")
+        
+        loan = Loan.objects.get(loan_id=102)
+        self.assertEqual(loan.customer_id, 1)
+        self.assertEqual(loan.tenure, 24)
+        self.assertEqual(loan.end_date, date(2023, 12, 31))
+        self.assertEqual(Customer.objects.get(customer_id=2).age, 28)
+
+    def test_missing_columns_reported(self):
+        """Test files without a required column fail with a clear error"""
+        path = os.path.join(self.temp_dir.name, 'customers.csv')
+        with open(path, 'w') as csv_file:
+            csv_file.write('customer_id,first_name\n1,John\n')
+        with self.assertLogs('loans.tasks', level='ERROR'):
+            result = ingest_customer_data(path)
+        self.assertIn('missing columns: last_name, age', result)
+
+
 class APITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+
     def test_customer_registration(self):
         """Test customer registration endpoint"""
         url = reverse('register_customer')
@@ -113,6 +787,98 @@ class APITestCase(APITestCase):
         self.assertEqual(response.data['customer_id'], customer.customer_id)
         self.assertTrue(response.data['approval'])
 
+    def test_batch_loan_eligibility_check(self):
+        """Test batch loan eligibility endpoint"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        
+        url = reverse('check_eligibility_batch')
+        data = [
+            {'customer_id': customer.customer_id, 'loan_amount': 100000, 'interest_rate': 8.0, 'tenure': 12},
+            {'customer_id': customer.customer_id, 'loan_amount': 5000000, 'interest_rate': 8.0, 'tenure': 12},
+            {'customer_id': 999999, 'loan_amount': 100000, 'interest_rate': 8.0, 'tenure': 12},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+        self.assertTrue(response.data[0]['approval'])
+        self.assertFalse(response.data[1]['approval'])
+        self.assertFalse(response.data[2]['approval'])
+        
+        single = self.client.post(reverse('check_eligibility'), data[0], format='json')
+        # Only check-eligibility issues quote tokens
+        single.data.pop('quote_token')
+        self.assertEqual(response.data[0], single.data)
+
+    def test_quote_loan_grid(self):
+        """Test EMI quote grid matches individual eligibility checks"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        
+        url = reverse('quote_loan_grid')
+        data = {
+            'customer_id': customer.customer_id,
+            'loan_amount': 200000,
+            'tenures': [6, 12, 24],
+            'interest_rates': [8.0, 14.5]
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['quotes']), 6)
+        self.assertEqual([quote['tenure'] for quote in response.data['quotes']], [6, 6, 12, 12, 24, 24])
+        self.assertFalse(response.data['quotes'][0]['approval'])
+        
+        single = self.client.post(reverse('check_eligibility'), {
+            'customer_id': customer.customer_id, 'loan_amount': 200000, 'interest_rate': 14.5, 'tenure': 12
+        }, format='json')
+        single.data.pop('quote_token')
+        self.assertEqual(response.data['quotes'][3], single.data)
+        
+        data['customer_id'] = 999999
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_max_loan_offer(self):
+        """Test maximum approvable amount is approved and one cent more is not"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        
+        url = reverse('max_loan_offer')
+        data = {'customer_id': customer.customer_id, 'interest_rate': 8.0, 'tenures': [12, 36]}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['offers']), 2)
+        
+        for offer in response.data['offers']:
+            self.assertLessEqual(offer['monthly_installment'], 25000)
+            max_amount = Decimal(str(offer['max_loan_amount']))
+            approved = check_loan_eligibility(customer.customer_id, max_amount, Decimal('8.0'), offer['tenure'])
+            rejected = check_loan_eligibility(customer.customer_id, max_amount + Decimal('0.01'), Decimal('8.0'), offer['tenure'])
+            self.assertTrue(approved['eligible'])
+            self.assertFalse(rejected['eligible'])
+        
+        data['customer_id'] = 999999
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_loan_creation(self):
         """Test loan creation endpoint"""
         # First create a customer
@@ -136,6 +902,100 @@ class APITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(response.data['loan_approved'])
         self.assertIsNotNone(response.data['loan_id'])
+        
+        summary = CustomerLoanSummary.objects.get(customer=customer)
+        self.assertEqual(summary.loan_count, 1)
+        self.assertEqual(summary.total_loan_amount, Decimal('100000'))
+
+    def test_create_loan_idempotency_key(self):
+        """Retries with the same Idempotency-Key replay the first response without writing"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        url = reverse('create_loan')
+        data = {'customer_id': customer.customer_id, 'loan_amount': 100000, 'interest_rate': 8.0, 'tenure': 12}
+
+        first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        with mock.patch('loans.services.check_loan_eligibility') as check:
+            retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        check.assert_not_called()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        # A fresh quote token does not make the retry a different request
+        retry = self.client.post(url, {**data, 'quote_token': 'fresh'}, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Loan.objects.filter(customer=customer).count(), 1)
+        customer.refresh_from_db()
+        self.assertEqual(customer.current_debt, Decimal('100000'))
+
+        # The same key for another request is an error, a new key is a new loan
+        response = self.client.post(url, {**data, 'tenure': 24}, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertNotEqual(response.data['loan_id'], first.data['loan_id'])
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='x' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Expired keys are purged, and an expired key still in the table starts over
+        IdempotencyKey.objects.filter(key='retry-2').update(expires_at=timezone.now() - timedelta(seconds=1))
+        IdempotencyKey.objects.create(
+            key='stale', request_fingerprint='', status_code=200, response_data={},
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.client.post(url, {**data, 'loan_amount': 10000}, format='json', HTTP_IDEMPOTENCY_KEY='stale')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Loan.objects.filter(customer=customer).count(), 3)
+        self.assertEqual(purge_idempotency_keys(), 'Purged 1 expired idempotency keys')
+        self.assertEqual(set(IdempotencyKey.objects.values_list('key', flat=True)), {'retry-1', 'stale'})
+
+    def test_create_loan_idempotency_claim(self):
+        """An Idempotency-Key is claimed outside the view and released if the view fails"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        url = reverse('create_loan')
+        data = {'customer_id': customer.customer_id, 'loan_amount': 100000, 'interest_rate': 8.0, 'tenure': 12}
+
+        # A claim that is still pending is not waited on
+        IdempotencyKey.objects.create(
+            key='pending', request_fingerprint=request_fingerprint(data),
+            expires_at=timezone.now() + timedelta(seconds=60)
+        )
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='pending')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Loan.objects.exists())
+
+        # A claim abandoned past its timeout is taken over
+        IdempotencyKey.objects.filter(key='pending').update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='pending')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.get(key='pending').status_code, status.HTTP_201_CREATED)
+
+        # Errors and 5xx responses release the claim so a retry runs again
+        with mock.patch('loans.views.create_loan_if_eligible', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='fails')
+        self.assertFalse(IdempotencyKey.objects.filter(key='fails').exists())
+        with mock.patch('loans.views.create_loan_if_eligible', side_effect=Customer.DoesNotExist):
+            response = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='fails')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(IdempotencyKey.objects.get(key='fails').status_code, status.HTTP_404_NOT_FOUND)
 
     def test_view_loan(self):
         """Test view loan endpoint"""
@@ -166,6 +1026,48 @@ class APITestCase(APITestCase):
         self.assertEqual(response.data['loan_id'], loan.loan_id)
         self.assertEqual(response.data['customer']['first_name'], 'John')
 
+    def test_view_loan_schedule(self):
+        """Test streamed and bulk amortization schedules agree and clear the loan"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        
+        loan = Loan.objects.create(
+            customer=customer,
+            loan_amount=Decimal('100000'),
+            tenure=12,
+            interest_rate=Decimal('10.0'),
+            monthly_repayment=Decimal('8791.59'),
+            start_date='2023-01-01',
+            end_date='2023-12-31',
+            emis_paid_on_time=0
+        )
+        
+        url = reverse('view_loan_schedule', kwargs={'loan_id': loan.loan_id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        streamed = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(streamed), 12)
+        self.assertEqual(streamed[0]['interest'], 833.33)
+        self.assertEqual(streamed[-1]['balance'], 0)
+        self.assertAlmostEqual(sum(row['principal'] for row in streamed), 100000, places=1)
+        
+        response = self.client.get(url, {'bulk': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 12)
+        for bulk_row, streamed_row in zip(response.data, streamed):
+            for key in ('payment', 'principal', 'interest', 'balance'):
+                self.assertAlmostEqual(bulk_row[key], streamed_row[key], delta=0.011)
+        
+        response = self.client.get(reverse('view_loan_schedule', kwargs={'loan_id': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_view_customer_loans(self):
         """Test view customer loans endpoint"""
         # Create customer and loan
@@ -194,3 +1096,590 @@ class APITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(float(response.data[0]['loan_amount']), 100000)
+
+    def test_customer_loans_keyset_pages_and_stream(self):
+        """Test paging and streaming a customer's loans return every loan once, in order"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        Loan.objects.bulk_create([
+            Loan(
+                customer=customer,
+                loan_amount=Decimal('1000') * (index + 1),
+                tenure=12,
+                interest_rate=Decimal('10.0'),
+                monthly_repayment=Decimal('88'),
+                start_date='2023-01-01',
+                end_date='2023-12-31',
+                emis_paid_on_time=index
+            )
+            for index in range(7)
+        ])
+        loan_ids = list(Loan.objects.filter(customer=customer).order_by('loan_id').values_list('loan_id', flat=True))
+        url = reverse('view_customer_loans', kwargs={'customer_id': customer.customer_id})
+        
+        paged_ids = []
+        next_url = f'{url}?page_size=3'
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            paged_ids.extend(loan['loan_id'] for loan in response.data['results'])
+            next_url = response.data['next']
+        self.assertEqual(paged_ids, loan_ids)
+        
+        response = self.client.get(url, {'stream': 'true', 'cursor': loan_ids[1]})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['loan_id'] for row in rows], loan_ids[2:])
+        self.assertEqual(rows[0]['repayments_left'], 10)
+        
+        response = self.client.get(url, {'page_size': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('page_size', response.data)
+
+    def test_loan_read_endpoints_conditional_get(self):
+        """Test ETags give 304s and cached bodies until a loan or its customer is written"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        loans = [
+            Loan.objects.create(
+                customer=customer,
+                loan_amount=Decimal('100000'),
+                tenure=12,
+                interest_rate=Decimal('10.0'),
+                monthly_repayment=Decimal('8791'),
+                start_date='2023-01-01',
+                end_date='2023-12-31',
+                emis_paid_on_time=0
+            )
+            for _ in range(2)
+        ]
+        loan_url = reverse('view_loan', kwargs={'loan_id': loans[0].loan_id})
+        loans_url = reverse('view_customer_loans', kwargs={'customer_id': customer.customer_id})
+        
+        for url in (loan_url, loans_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response['ETag']
+            
+            # Revalidation and repeat fetches only run the validator query
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        loan_etag = self.client.get(loan_url)['ETag']
+        customer.first_name = "Jane"
+        customer.save()
+        response = self.client.get(loan_url, HTTP_IF_NONE_MATCH=loan_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['customer']['first_name'], 'Jane')
+        
+        loans_etag = self.client.get(loans_url)['ETag']
+        deleted_url = reverse('view_loan', kwargs={'loan_id': loans[1].loan_id})
+        loans[1].delete()
+        response = self.client.get(loans_url, HTTP_IF_NONE_MATCH=loans_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        
+        response = self.client.get(deleted_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ingestion_status(self):
+        """Test the ingestion status endpoint reports a running task's progress"""
+        snapshot = {
+            'stage': 'loans', 'rows_total': 1000, 'rows_read': 250, 'rows_written': 240,
+            'rows_skipped': 10, 'rows_unchanged': 0, 'rows_quarantined': 0, 'elapsed_seconds': 5.0,
+            'rows_per_second': 50.0, 'eta_seconds': 15.0,
+        }
+        running_task = mock.Mock(state='PROGRESS', info=snapshot, result=snapshot)
+        with mock.patch('loans.progress.GroupResult.restore', return_value=None), \
+                mock.patch('loans.progress.AsyncResult', return_value=running_task):
+            response = self.client.get(reverse('ingestion_status', kwargs={'task_id': 'abc'}))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['state'], 'PROGRESS')
+        self.assertEqual(response.data['progress']['loans']['rows_read'], 250)
+        self.assertEqual(response.data['progress']['loans']['eta_seconds'], 15.0)
+        self.assertIsNone(response.data['result'])
+
+
+class LoanCreationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000'),
+            current_debt=Decimal('1000')
+        )
+        self.application = (self.customer.customer_id, Decimal('100000'), Decimal('8.0'), 12)
+
+    def test_loan_created_and_debt_incremented(self):
+        """Test the approved loan is written with the debt incremented in the database"""
+        eligibility_result, loan = create_loan_if_eligible(*self.application)
+        self.assertTrue(eligibility_result['eligible'])
+        self.assertEqual(loan.monthly_repayment, Decimal(str(eligibility_result['monthly_installment'])))
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.current_debt, Decimal('101000'))
+        self.assertEqual(get_loan_summary(self.customer).loan_count, 1)
+
+    def test_approval_rechecked_against_locked_customer(self):
+        """Test headroom used up after the unlocked eligibility check rejects the application"""
+        approved = check_loan_eligibility(*self.application)
+        # Another application for the customer commits in between
+        create_loan_if_eligible(self.customer.customer_id, Decimal('200000'), Decimal('8.0'), 12)
+
+        with mock.patch('loans.services.check_loan_eligibility', return_value=approved):
+            eligibility_result, loan = create_loan_if_eligible(*self.application)
+        self.assertIsNone(loan)
+        self.assertEqual(eligibility_result['message'], 'EMI exceeds 50% of monthly salary')
+        self.assertEqual(Loan.objects.filter(customer=self.customer).count(), 1)
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.current_debt, Decimal('201000'))
+
+    def test_quote_token_skips_rescoring(self):
+        """Test a quote token from check-eligibility is redeemed without evaluating eligibility again"""
+        customer_id, loan_amount, interest_rate, tenure = self.application
+        response = self.client.post(reverse('check_eligibility'), {
+            'customer_id': customer_id, 'loan_amount': 100000, 'interest_rate': 8.0, 'tenure': tenure
+        }, content_type='application/json')
+        quote_token = response.json()['quote_token']
+        self.assertIsNotNone(quote_token)
+
+        with mock.patch('loans.services.check_loan_eligibility') as check, \
+                mock.patch('loans.services.evaluate_loan_eligibility') as evaluate:
+            response = self.client.post(reverse('create_loan'), {
+                'customer_id': customer_id, 'loan_amount': 100000, 'interest_rate': 8.0, 'tenure': tenure,
+                'quote_token': quote_token
+            }, content_type='application/json')
+        check.assert_not_called()
+        evaluate.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        loan = Loan.objects.get(loan_id=response.json()['loan_id'])
+        self.assertEqual(float(loan.monthly_repayment), response.json()['monthly_installment'])
+
+        rejected = self.client.post(reverse('check_eligibility'), {
+            'customer_id': customer_id, 'loan_amount': 5000000, 'interest_rate': 8.0, 'tenure': tenure
+        }, content_type='application/json')
+        self.assertIsNone(rejected.json()['quote_token'])
+
+    def test_stale_or_foreign_quote_token_evaluated_in_full(self):
+        """Test quotes for changed customer state, other applications or past their age are not trusted"""
+        application = dict(zip(['customer_id', 'loan_amount', 'interest_rate', 'tenure'], self.application))
+        quote_token = issue_quote_token(application, check_loan_eligibility(*self.application))
+        self.assertIsNotNone(redeem_quote_token(quote_token, *self.application))
+        self.assertIsNone(redeem_quote_token(quote_token, self.customer.customer_id, Decimal('100001'), Decimal('8.0'), 12))
+        self.assertIsNone(redeem_quote_token(quote_token[:-1], *self.application))
+        with override_settings(QUOTE_TOKEN_MAX_AGE=-1):
+            self.assertIsNone(redeem_quote_token(quote_token, *self.application))
+
+        # Another loan changes the customer's state version after the quote
+        create_loan_if_eligible(self.customer.customer_id, Decimal('250000'), Decimal('8.0'), 12)
+        with mock.patch('loans.services.evaluate_loan_eligibility', wraps=evaluate_loan_eligibility) as evaluate:
+            eligibility_result, loan = create_loan_if_eligible(*self.application, quote_token=quote_token)
+        evaluate.assert_called_once()
+        self.assertIsNone(loan)
+        self.assertEqual(eligibility_result['message'], 'EMI exceeds 50% of monthly salary')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SQLite has no row locks to contend on')
+class ConcurrentLoanCreationTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_applications_cannot_overspend(self):
+        """Test simultaneous applications for one customer never exceed its EMI limit or lose debt"""
+        customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        application = (customer.customer_id, Decimal('60000'), Decimal('8.0'), 12)
+        barrier = threading.Barrier(12)
+        results = []
+
+        def apply():
+            try:
+                barrier.wait()
+                results.append(create_loan_if_eligible(*application))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=apply) for _ in range(barrier.parties)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        loans = Loan.objects.filter(customer=customer)
+        approved = [loan for _, loan in results if loan is not None]
+        self.assertEqual(len(results), barrier.parties)
+        self.assertEqual(len(approved), loans.count())
+        self.assertTrue(0 < len(approved) < barrier.parties)
+        self.assertLessEqual(sum(loan.monthly_repayment for loan in loans), customer.monthly_salary / 2)
+        customer.refresh_from_db()
+        self.assertEqual(customer.current_debt, sum(loan.loan_amount for loan in loans))
+        summary = CustomerLoanSummary.objects.get(customer=customer)
+        expected = compute_loan_summaries([customer.customer_id])[customer.customer_id]
+        self.assertEqual(summary.loan_count, expected.loan_count)
+        self.assertEqual(summary.total_loan_amount, expected.total_loan_amount)
+        self.assertEqual(summary.active_emi_sum, expected.active_emi_sum)
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Every endpoint and hot service function has a query budget, and its query
+    count must not grow with the number of customers or loans involved
+    """
+    client_class = APIClient
+    ENDPOINT_BUDGETS = {
+        'api_root': 0,
+        'register_customer': 3,
+        'check_eligibility': 1,
+        'check_eligibility_batch': 1,
+        'quote_loan_grid': 1,
+        'max_loan_offer': 1,
+        # Eligibility, then the locked re-check and writes, counting savepoints
+        'create_loan': 10,
+        'view_loan': 2,
+        'view_loan_schedule': 1,
+        'view_customer_loans': 2,
+        'credit_score_cache_stats': 0,
+        'ingestion_status': 0,
+    }
+    SERVICE_BUDGETS = {
+        'check_loan_eligibility': 1,
+        'check_loan_eligibility_batch': 1,
+        'calculate_credit_scores': 1,
+        'quote_loan_grid': 1,
+        'calculate_max_approvable_amounts': 1,
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.phone_numbers = iter(range(5550000000, 5559999999))
+
+    def create_customers(self, customer_count, loans_per_customer):
+        customers = []
+        for _ in range(customer_count):
+            customer = Customer.objects.create(
+                first_name="John",
+                last_name="Doe",
+                age=30,
+                phone_number=str(next(self.phone_numbers)),
+                monthly_salary=Decimal('50000'),
+                approved_limit=Decimal('1800000')
+            )
+            Loan.objects.bulk_create([
+                Loan(
+                    customer=customer,
+                    loan_amount=Decimal('10000'),
+                    tenure=12,
+                    interest_rate=Decimal('10.0'),
+                    monthly_repayment=Decimal('879'),
+                    start_date=date(2023, 1, 1),
+                    end_date=date(2023, 12, 31),
+                    emis_paid_on_time=12
+                )
+                for _ in range(loans_per_customer)
+            ])
+            customers.append(customer)
+        rebuild_loan_summaries([customer.customer_id for customer in customers])
+        return customers
+
+    def endpoint_requests(self, customers):
+        customer_id = customers[0].customer_id
+        loan_id = Loan.objects.filter(customer_id=customer_id).values_list('loan_id', flat=True).first()
+        application = {'customer_id': customer_id, 'loan_amount': 50000, 'interest_rate': 10.0, 'tenure': 12}
+        return {
+            'api_root': ('get', reverse('api_root'), None),
+            'register_customer': ('post', reverse('register_customer'), {
+                'first_name': 'Jane', 'last_name': 'Doe', 'age': 28,
+                'monthly_income': 60000, 'phone_number': str(next(self.phone_numbers)),
+            }),
+            'check_eligibility': ('post', reverse('check_eligibility'), application),
+            'check_eligibility_batch': ('post', reverse('check_eligibility_batch'), [
+                {**application, 'customer_id': customer.customer_id} for customer in customers
+            ]),
+            'quote_loan_grid': ('post', reverse('quote_loan_grid'), {
+                'customer_id': customer_id, 'loan_amount': 50000, 'tenures': [12, 24], 'interest_rates': [8, 12],
+            }),
+            'max_loan_offer': ('post', reverse('max_loan_offer'), {
+                'customer_id': customer_id, 'interest_rate': 10.0, 'tenures': [12, 24],
+            }),
+            'create_loan': ('post', reverse('create_loan'), application),
+            'view_loan': ('get', reverse('view_loan', kwargs={'loan_id': loan_id}), None),
+            'view_loan_schedule': ('get', reverse('view_loan_schedule', kwargs={'loan_id': loan_id}), None),
+            'view_customer_loans': ('get', reverse('view_customer_loans', kwargs={'customer_id': customer_id}), None),
+            'credit_score_cache_stats': ('get', reverse('credit_score_cache_stats'), None),
+            'ingestion_status': ('get', reverse('ingestion_status', kwargs={'task_id': 'abc'}), None),
+        }
+
+    def measure_endpoints(self, customers):
+        counts = {}
+        done_task = mock.Mock(state='SUCCESS', result='done')
+        with mock.patch('loans.progress.GroupResult.restore', return_value=None), \
+                mock.patch('loans.progress.AsyncResult', return_value=done_task):
+            for name, (method, url, data) in self.endpoint_requests(customers).items():
+                cache.clear()
+                with query_budget(self.ENDPOINT_BUDGETS[name], label=name) as queries:
+                    response = getattr(self.client, method)(url, data, format='json')
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 400, name)
+                counts[name] = len(queries)
+        return counts
+
+    def test_every_endpoint_has_a_budget(self):
+        """Test new URLs cannot be added without declaring their query budget"""
+        url_names = {pattern.name for pattern in get_resolver('loans.urls').url_patterns}
+        self.assertEqual(url_names, set(self.ENDPOINT_BUDGETS))
+
+    def test_endpoint_query_counts_within_budget_and_constant(self):
+        """Test endpoints stay within budget and run as many queries for 1 loan as for 10"""
+        small = self.measure_endpoints(self.create_customers(1, 1))
+        large = self.measure_endpoints(self.create_customers(5, 10))
+        self.assertEqual(small, large)
+
+    def test_service_query_counts_within_budget_and_constant(self):
+        """Test scoring and eligibility services run a fixed number of queries"""
+        for customer_count, loans_per_customer in ((1, 1), (5, 10)):
+            customers = self.create_customers(customer_count, loans_per_customer)
+            customer_ids = [customer.customer_id for customer in customers]
+            calls = {
+                'check_loan_eligibility': lambda: check_loan_eligibility(customer_ids[0], Decimal('50000'), 10.0, 12),
+                'check_loan_eligibility_batch': lambda: check_loan_eligibility_batch([
+                    {'customer_id': customer_id, 'loan_amount': Decimal('50000'), 'interest_rate': Decimal('10'), 'tenure': 12}
+                    for customer_id in customer_ids
+                ]),
+                'calculate_credit_scores': lambda: calculate_credit_scores(customer_ids),
+                'quote_loan_grid': lambda: quote_loan_grid(customer_ids[0], Decimal('50000'), [12, 24], [8, 12]),
+                'calculate_max_approvable_amounts': lambda: calculate_max_approvable_amounts(customer_ids[0], 10.0, [12, 24]),
+            }
+            self.assertEqual(set(calls), set(self.SERVICE_BUDGETS))
+            for name, call in calls.items():
+                cache.clear()
+                with query_budget(self.SERVICE_BUDGETS[name], label=name):
+                    call()
+
+    def test_query_budget_exceeded(self):
+        """Test exceeding a budget fails with the offending queries listed"""
+        customers = self.create_customers(2, 1)
+        with self.assertRaisesRegex(QueryBudgetExceeded, 'ran 2 queries, budget is 1'):
+            with query_budget(1):
+                for customer in customers:
+                    Customer.objects.get(customer_id=customer.customer_id)
+
+    @override_settings(DEBUG=True, REPEATED_QUERY_THRESHOLD=3)
+    def test_repeated_query_middleware_logs_n_plus_one(self):
+        """Test a query repeated once per loan is logged as a possible N+1"""
+        customer = self.create_customers(1, 4)[0]
+        self.assertEqual(
+            query_shape('SELECT * FROM "loans" WHERE "loan_id" IN (%s, %s) LIMIT 21'),
+            query_shape('SELECT * FROM "loans" WHERE "loan_id" IN (%s) LIMIT 21')
+        )
+
+        def n_plus_one_view(request):
+            for loan in Loan.objects.filter(customer=customer):
+                Customer.objects.get(customer_id=loan.customer_id)
+            return HttpResponse()
+
+        middleware = RepeatedQueryMiddleware(n_plus_one_view)
+        with self.assertLogs('loans.middleware', level='WARNING') as logs:
+            middleware(RequestFactory().get('/view-loans/1/'))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('GET /view-loans/1/: ran 4 times', logs.output[0])
+
+    @override_settings(DEBUG=True, REPEATED_QUERY_THRESHOLD=3)
+    def test_repeated_query_middleware_logs_async_view_queries(self):
+        """Test the middleware stays async for async views and records their ORM queries"""
+        customer = self.create_customers(1, 4)[0]
+
+        async def n_plus_one_view(request):
+            async for loan in Loan.objects.filter(customer=customer):
+                await Customer.objects.aget(customer_id=loan.customer_id)
+            return HttpResponse()
+
+        middleware = RepeatedQueryMiddleware(n_plus_one_view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs('loans.middleware', level='WARNING') as logs:
+            async_to_sync(middleware)(AsyncRequestFactory().get('/view-loans/1/'))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('GET /view-loans/1/: ran 4 times', logs.output[0])
+        self.assertEqual(connection.execute_wrappers, [])
+
+
+class FastSerializationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(
+            first_name="Zoë",
+            last_name="O'Neil",
+            age=41,
+            phone_number="9876543210",
+            monthly_salary=Decimal('61234.5'),
+            approved_limit=2200000
+        )
+        for amount, rate, repayment, paid in (('100000', '10.5', '8791.59', 3), ('2500.05', '7', '120', 40)):
+            Loan.objects.create(
+                customer=self.customer,
+                loan_amount=Decimal(amount),
+                tenure=24,
+                interest_rate=Decimal(rate),
+                monthly_repayment=Decimal(repayment),
+                start_date=date(2023, 1, 1),
+                end_date=date(2024, 12, 31),
+                emis_paid_on_time=paid
+            )
+
+    def test_fast_serializers_match_model_serializers(self):
+        """Test the .values() fast path renders the same bytes as the ModelSerializers"""
+        renderer = JSONRenderer()
+        loans = Loan.objects.select_related('customer').order_by('loan_id')
+        rows = Loan.objects.order_by('loan_id')
+        
+        for loan, row in zip(loans, rows.values(*LOAN_DETAIL_FIELDS)):
+            self.assertEqual(renderer.render(loan_detail_data(row)), renderer.render(LoanDetailSerializer(loan).data))
+        self.assertEqual(
+            renderer.render([customer_loan_data(row) for row in rows.values(*CUSTOMER_LOAN_FIELDS)]),
+            renderer.render(CustomerLoanSerializer(loans, many=True).data)
+        )
+        # approved_limit is still the int computed at registration, before a reload
+        self.assertEqual(
+            renderer.render(customer_registration_data(self.customer)),
+            renderer.render(CustomerRegistrationResponseSerializer(self.customer).data)
+        )
+
+    def test_fast_json_renderer_matches_json_renderer(self):
+        """Test the orjson renderer produces the same bytes as DRF's JSONRenderer"""
+        data = OrderedDict([
+            ('name', "Zoë \u2028 O'Neil"),
+            ('amount', Decimal('8791.59')),
+            ('rate', 8698.84),
+            ('created_at', datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=dt_timezone.utc)),
+            ('start_date', date(2024, 5, 6)),
+            ('by_id', {1: [True, None], 2: ()}),
+            ('loans', [customer_loan_data(row) for row in Loan.objects.values(*CUSTOMER_LOAN_FIELDS)]),
+        ])
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4')
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        # orjson rejects ints beyond 64 bits; the stock renderer takes over
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 64}), JSONRenderer().render({'big': 2 ** 64}))
+
+    def test_fast_json_renderer_uses_orjson(self):
+        """Test orjson (from requirements-dev.txt) is installed, so the orjson path is the one compared"""
+        self.assertIsNotNone(renderers.orjson)
+
+    def test_fast_json_renderer_only_on_float_free_endpoints(self):
+        """Test float-bearing responses keep the stock renderer, since orjson formats floats differently"""
+        self.assertNotEqual(FastJSONRenderer().render({'rate': 1e-05}), JSONRenderer().render({'rate': 1e-05}))
+        self.assertEqual(settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'], ['rest_framework.renderers.JSONRenderer'])
+        for view in (views.register_customer, views.view_loan, views.view_customer_loans):
+            self.assertEqual(view.cls.renderer_classes, [FastJSONRenderer])
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number="1234567890",
+            monthly_salary=Decimal('50000'),
+            approved_limit=Decimal('1800000')
+        )
+        self.loans = [
+            Loan.objects.create(
+                customer=self.customer,
+                loan_amount=Decimal('100000'),
+                tenure=12,
+                interest_rate=Decimal('10.0'),
+                monthly_repayment=Decimal('8791'),
+                start_date=date(2023, 1, 1),
+                end_date=date(2023, 12, 31),
+                emis_paid_on_time=index
+            )
+            for index in range(3)
+        ]
+
+    async def assert_same_response(self, view, path, method='get', data=None, headers=None, **kwargs):
+        if data is not None and not isinstance(data, str):
+            data = json.dumps(data)
+        request_kwargs = {'content_type': 'application/json'} if method == 'post' else {}
+        request_kwargs['headers'] = headers
+        
+        def sync_request():
+            response = getattr(self.client, method)(path, data, **request_kwargs)
+            return response, b''.join(response.streaming_content) if response.streaming else response.content
+        
+        await cache.aclear()
+        sync_response, sync_content = await sync_to_async(sync_request)()
+        await cache.aclear()
+        request = getattr(AsyncRequestFactory(), method)(path, data, **request_kwargs)
+        async_response = await view(request, **kwargs)
+        if async_response.streaming:
+            async_content = b''.join([chunk async for chunk in async_response.streaming_content])
+        else:
+            async_content = async_response.content
+        
+        self.assertEqual(async_response.status_code, sync_response.status_code, path)
+        self.assertEqual(async_content, sync_content, path)
+        self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'), path)
+        return async_response
+
+    async def test_async_views_match_sync_views(self):
+        """Test the async eligibility and loan read views answer exactly like the DRF views"""
+        loan_id = self.loans[0].loan_id
+        customer_id = self.customer.customer_id
+        loan_path = reverse('view_loan', kwargs={'loan_id': loan_id})
+        loans_path = reverse('view_customer_loans', kwargs={'customer_id': customer_id})
+        eligibility_path = reverse('check_eligibility')
+        application = {'customer_id': customer_id, 'loan_amount': 50000, 'interest_rate': 10.0, 'tenure': 12}
+        
+        response = await self.assert_same_response(async_views.view_loan, loan_path, loan_id=loan_id)
+        response = await self.assert_same_response(
+            async_views.view_loan, loan_path, headers={'If-None-Match': response['ETag']}, loan_id=loan_id
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        await self.assert_same_response(async_views.view_loan, '/view-loan/999999/', loan_id=999999)
+        await self.assert_same_response(async_views.view_loan, loan_path, method='post', data={}, loan_id=loan_id)
+        
+        for query in ('', '?page_size=2', f'?page_size=2&cursor={loan_id}', '?stream=true', '?page_size=0'):
+            await self.assert_same_response(async_views.view_customer_loans, loans_path + query, customer_id=customer_id)
+        await self.assert_same_response(async_views.view_customer_loans, '/view-loans/999999/', customer_id=999999)
+        
+        # Quote tokens are timestamped, so both views must sign in the same second
+        with mock.patch.object(signing.TimestampSigner, 'timestamp', return_value='1xIGQ5'):
+            for data in (application, {**application, 'customer_id': 999999}, {**application, 'tenure': 'x'}, '{"customer_id": '):
+                await self.assert_same_response(async_views.check_eligibility, eligibility_path, method='post', data=data)
+        await self.assert_same_response(async_views.check_eligibility, eligibility_path)
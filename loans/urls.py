@@ -1,11 +1,21 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the I/O-bound eligibility and loan reads are served natively async
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', views.api_root, name='api_root'),
     path('register/', views.register_customer, name='register_customer'),
-    path('check-eligibility/', views.check_eligibility, name='check_eligibility'),
+    path('check-eligibility/', read_views.check_eligibility, name='check_eligibility'),
+    path('check-eligibility/batch/', views.check_eligibility_batch, name='check_eligibility_batch'),
+    path('check-eligibility/grid/', views.quote_loan_grid_view, name='quote_loan_grid'),
+    path('check-eligibility/max-offer/', views.max_loan_offer, name='max_loan_offer'),
     path('create-loan/', views.create_loan, name='create_loan'),
-    path('view-loan/<int:loan_id>/', views.view_loan, name='view_loan'),
-    path('view-loans/<int:customer_id>/', views.view_customer_loans, name='view_customer_loans'),
+    path('view-loan/<int:loan_id>/', read_views.view_loan, name='view_loan'),
+    path('view-loan/<int:loan_id>/schedule/', views.view_loan_schedule, name='view_loan_schedule'),
+    path('view-loans/<int:customer_id>/', read_views.view_customer_loans, name='view_customer_loans'),
+    path('credit-score-cache/stats/', views.credit_score_cache_stats, name='credit_score_cache_stats'),
+    path('ingestion/<str:task_id>/', views.ingestion_status, name='ingestion_status'),
 ]
@@ -1,26 +1,52 @@
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from decimal import Decimal
-from datetime import datetime, date
-from dateutil.relativedelta import relativedelta
+import json
 
 from .models import Customer, Loan
 from .serializers import (
     CustomerRegistrationSerializer,
-    CustomerRegistrationResponseSerializer,
     LoanEligibilitySerializer,
-    LoanEligibilityResponseSerializer,
+    LoanQuoteGridSerializer,
+    MaxLoanOfferSerializer,
     LoanCreateSerializer,
-    LoanCreateResponseSerializer,
-    LoanDetailSerializer,
-    CustomerLoanSerializer
+    CustomerLoansQuerySerializer
+)
+from .fast_serializers import (
+    CUSTOMER_LOAN_FIELDS,
+    LOAN_DETAIL_FIELDS,
+    customer_loan_data,
+    customer_registration_data,
+    loan_detail_data
+)
+from .amortization import amortization_rows, amortization_table, iter_amortization_schedule
+from .scoring_cache import get_credit_profile_cache_stats
+from .progress import get_ingestion_status
+from .idempotency import idempotent
+from .renderers import FastJSONRenderer
+from .quotes import issue_quote_token
+from .response_cache import (
+    conditional_response,
+    customer_loans_validators,
+    loan_validators,
+    not_modified_response,
+    set_validator_headers
+)
+from .services import (
+    check_loan_eligibility,
+    check_loan_eligibility_batch,
+    calculate_max_approvable_amounts,
+    create_loan_if_eligible,
+    quote_loan_grid
 )
-from .services import check_loan_eligibility, calculate_monthly_installment
 
 
 @api_view(['POST'])
+@renderer_classes([FastJSONRenderer])
 def register_customer(request):
     """
     Register a new customer
@@ -28,15 +54,15 @@ def register_customer(request):
     serializer = CustomerRegistrationSerializer(data=request.data)
     if serializer.is_valid():
         customer = serializer.save()
-        response_serializer = CustomerRegistrationResponseSerializer(customer)
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        return Response(customer_registration_data(customer), status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
 def check_eligibility(request):
     """
-    Check loan eligibility for a customer
+    Check loan eligibility for a customer. Approvals come with a quote_token
+    that create-loan accepts in place of re-checking eligibility.
     """
     serializer = LoanEligibilitySerializer(data=request.data)
     if serializer.is_valid():
@@ -50,23 +76,120 @@ def check_eligibility(request):
             customer_id, loan_amount, interest_rate, tenure
         )
         
+        response_data = _eligibility_response_data(serializer.validated_data, eligibility_result)
+        response_data['quote_token'] = issue_quote_token(serializer.validated_data, eligibility_result)
+        
+        return Response(response_data, status=status.HTTP_200_OK)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def check_eligibility_batch(request):
+    """
+    Check loan eligibility for a list of applications in one request
+    """
+    serializer = LoanEligibilitySerializer(data=request.data, many=True)
+    if serializer.is_valid():
+        applications = serializer.validated_data
+        eligibility_results = check_loan_eligibility_batch(applications)
+        
+        response_data = [
+            _eligibility_response_data(application, eligibility_result)
+            for application, eligibility_result in zip(applications, eligibility_results)
+        ]
+        
+        return Response(response_data, status=status.HTTP_200_OK)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def quote_loan_grid_view(request):
+    """
+    Quote one loan amount across several tenures and interest rates
+    """
+    serializer = LoanQuoteGridSerializer(data=request.data)
+    if serializer.is_valid():
+        customer_id = serializer.validated_data['customer_id']
+        loan_amount = serializer.validated_data['loan_amount']
+        
+        grid = quote_loan_grid(
+            customer_id,
+            loan_amount,
+            serializer.validated_data['tenures'],
+            serializer.validated_data['interest_rates']
+        )
+        if grid is None:
+            return Response({'message': 'Customer not found'}, status=status.HTTP_404_NOT_FOUND)
+        
         response_data = {
             'customer_id': customer_id,
-            'approval': eligibility_result['eligible'],
-            'interest_rate': float(interest_rate),
-            'corrected_interest_rate': eligibility_result['corrected_interest_rate'],
-            'tenure': tenure,
-            'monthly_installment': round(eligibility_result['monthly_installment'], 2)
+            'loan_amount': float(loan_amount),
+            'quotes': [
+                _eligibility_response_data(
+                    {'customer_id': customer_id, 'interest_rate': interest_rate, 'tenure': tenure},
+                    eligibility_result
+                )
+                for tenure, interest_rate, eligibility_result in grid
+            ]
         }
+        return Response(response_data, status=status.HTTP_200_OK)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def max_loan_offer(request):
+    """
+    Largest approvable loan amount for a customer at each requested tenure
+    """
+    serializer = MaxLoanOfferSerializer(data=request.data)
+    if serializer.is_valid():
+        customer_id = serializer.validated_data['customer_id']
+        interest_rate = serializer.validated_data['interest_rate']
+        
+        result = calculate_max_approvable_amounts(
+            customer_id, interest_rate, serializer.validated_data['tenures']
+        )
+        if result is None:
+            return Response({'message': 'Customer not found'}, status=status.HTTP_404_NOT_FOUND)
         
+        response_data = {
+            'customer_id': customer_id,
+            'interest_rate': float(interest_rate),
+            'corrected_interest_rate': result['corrected_interest_rate'],
+            'message': result['message'],
+            'offers': [
+                {
+                    'tenure': offer['tenure'],
+                    'max_loan_amount': float(offer['max_loan_amount']),
+                    'monthly_installment': round(offer['monthly_installment'], 2)
+                }
+                for offer in result['offers']
+            ]
+        }
         return Response(response_data, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _eligibility_response_data(application, eligibility_result):
+    """
+    Build the check-eligibility response body for one application
+    """
+    return {
+        'customer_id': application['customer_id'],
+        'approval': eligibility_result['eligible'],
+        'interest_rate': float(application['interest_rate']),
+        'corrected_interest_rate': eligibility_result['corrected_interest_rate'],
+        'tenure': application['tenure'],
+        'monthly_installment': round(eligibility_result['monthly_installment'], 2)
+    }
+
+
 @api_view(['POST'])
+@idempotent(fields=('customer_id', 'loan_amount', 'interest_rate', 'tenure'))
 def create_loan(request):
     """
-    Create a new loan if eligible
+    Create a new loan if eligible. Retries sent with the same Idempotency-Key
+    header get the first response back instead of creating another loan.
     """
     serializer = LoanCreateSerializer(data=request.data)
     if serializer.is_valid():
@@ -75,54 +198,28 @@ def create_loan(request):
         interest_rate = serializer.validated_data['interest_rate']
         tenure = serializer.validated_data['tenure']
         
-        # Check eligibility first
-        eligibility_result = check_loan_eligibility(
-            customer_id, loan_amount, interest_rate, tenure
-        )
-        
-        if not eligibility_result['eligible']:
-            response_data = {
-                'loan_id': None,
-                'customer_id': customer_id,
-                'loan_approved': False,
-                'message': eligibility_result['message'],
-                'monthly_installment': round(eligibility_result['monthly_installment'], 2)
-            }
-            return Response(response_data, status=status.HTTP_200_OK)
-        
-        # Create the loan
         try:
-            customer = Customer.objects.get(customer_id=customer_id)
-            
-            # Calculate dates
-            start_date = date.today()
-            end_date = start_date + relativedelta(months=tenure)
-            
-            # Use corrected interest rate
-            corrected_rate = eligibility_result['corrected_interest_rate']
-            monthly_installment = eligibility_result['monthly_installment']
-            
-            loan = Loan.objects.create(
-                customer=customer,
-                loan_amount=loan_amount,
-                tenure=tenure,
-                interest_rate=Decimal(str(corrected_rate)),
-                monthly_repayment=Decimal(str(monthly_installment)),
-                start_date=start_date,
-                end_date=end_date,
-                emis_paid_on_time=0
+            eligibility_result, loan = create_loan_if_eligible(
+                customer_id, loan_amount, interest_rate, tenure,
+                quote_token=serializer.validated_data.get('quote_token')
             )
             
-            # Update customer's current debt
-            customer.current_debt = (customer.current_debt or 0) + loan_amount
-            customer.save()
+            if loan is None:
+                response_data = {
+                    'loan_id': None,
+                    'customer_id': customer_id,
+                    'loan_approved': False,
+                    'message': eligibility_result['message'],
+                    'monthly_installment': round(eligibility_result['monthly_installment'], 2)
+                }
+                return Response(response_data, status=status.HTTP_200_OK)
             
             response_data = {
                 'loan_id': loan.loan_id,
                 'customer_id': customer_id,
                 'loan_approved': True,
                 'message': 'Loan approved successfully',
-                'monthly_installment': round(monthly_installment, 2)
+                'monthly_installment': round(eligibility_result['monthly_installment'], 2)
             }
             return Response(response_data, status=status.HTTP_201_CREATED)
             
@@ -140,24 +237,124 @@ def create_loan(request):
 
 
 @api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
 def view_loan(request, loan_id):
     """
-    View details of a specific loan
+    View details of a specific loan. Supports If-None-Match / If-Modified-Since.
+    """
+    validators = loan_validators(loan_id)
+    if validators is None:
+        raise Http404('No Loan matches the given query.')
+    
+    def serialize():
+        row = Loan.objects.filter(loan_id=loan_id).values(*LOAN_DETAIL_FIELDS).first()
+        if row is None:
+            raise Http404('No Loan matches the given query.')
+        return loan_detail_data(row)
+    
+    return conditional_response(request, validators, serialize)
+
+
+@api_view(['GET'])
+def view_loan_schedule(request, loan_id):
+    """
+    Month-by-month amortization schedule of a loan, streamed as JSON lines.
+    Pass ?bulk=true to compute the whole table at once and get a JSON list.
     """
     loan = get_object_or_404(Loan, loan_id=loan_id)
-    serializer = LoanDetailSerializer(loan)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    if request.query_params.get('bulk', '').lower() in ('1', 'true', 'yes'):
+        return Response(amortization_rows(amortization_table(loan)), status=status.HTTP_200_OK)
+    
+    lines = (json.dumps(row) + '\n' for row in iter_amortization_schedule(loan))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
 
 
 @api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
 def view_customer_loans(request, customer_id):
     """
-    View all loans for a specific customer
+    View all loans for a specific customer. Supports If-None-Match / If-Modified-Since.
+    Pass ?page_size=N (and the returned next_cursor as ?cursor=) for keyset pages,
+    or ?stream=true to get every loan after ?cursor= streamed as JSON lines.
+    Without any of them the full list is returned, as before paging existed.
+    """
+    query = CustomerLoansQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    cursor = query.validated_data.get('cursor')
+    
+    validators = customer_loans_validators(customer_id)
+    if validators is None:
+        raise Http404('No Customer matches the given query.')
+    
+    if query.validated_data['stream']:
+        response = not_modified_response(request, validators)
+        if response is None:
+            lines = (json.dumps(loan) + '\n' for loan in _iter_customer_loans(customer_id, cursor))
+            response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        return set_validator_headers(response, validators)
+    
+    if cursor is None and 'page_size' not in query.validated_data:
+        def serialize():
+            loans = Loan.objects.filter(customer_id=customer_id).values(*CUSTOMER_LOAN_FIELDS)
+            return [customer_loan_data(loan) for loan in loans]
+        
+        return conditional_response(request, validators, serialize)
+    
+    page_size = query.validated_data.get('page_size', settings.CUSTOMER_LOANS_PAGE_SIZE)
+    
+    def serialize_page():
+        loans = _customer_loans_after(customer_id, cursor)[:page_size + 1]
+        results = [customer_loan_data(loan) for loan in loans]
+        next_cursor = results[page_size - 1]['loan_id'] if len(results) > page_size else None
+        return {'results': results[:page_size], 'next_cursor': next_cursor}
+    
+    response = conditional_response(request, validators, serialize_page, variant=f'{cursor}:{page_size}')
+    if response.status_code == status.HTTP_200_OK:
+        # The next link depends on the host it was requested through, so it is not cached
+        next_cursor = response.data['next_cursor']
+        url = request.build_absolute_uri()
+        response.data = {
+            **response.data,
+            'next': replace_query_param(url, 'cursor', next_cursor) if next_cursor is not None else None,
+        }
+    return response
+
+
+def _customer_loans_after(customer_id, cursor=None):
+    """.values() rows of a customer's loans in loan_id order, starting after the cursor loan_id"""
+    loans = Loan.objects.filter(customer_id=customer_id).order_by('loan_id').values(*CUSTOMER_LOAN_FIELDS)
+    if cursor is not None:
+        loans = loans.filter(loan_id__gt=cursor)
+    return loans
+
+
+def _iter_customer_loans(customer_id, cursor=None):
+    """
+    Serialized loans of a customer read through a server-side cursor, so
+    memory stays flat however many loans it has
+    """
+    loans = _customer_loans_after(customer_id, cursor).iterator(chunk_size=settings.CUSTOMER_LOANS_PAGE_SIZE)
+    for loan in loans:
+        yield customer_loan_data(loan)
+
+
+@api_view(['GET'])
+def credit_score_cache_stats(request):
+    """
+    Hit/miss counters of the credit profile cache
+    """
+    return Response(get_credit_profile_cache_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def ingestion_status(request, task_id):
+    """
+    State and progress (rows read, written and skipped, rows/sec, ETA) of an
+    ingestion task or parallel ingestion workflow
     """
-    customer = get_object_or_404(Customer, customer_id=customer_id)
-    loans = Loan.objects.filter(customer=customer)
-    serializer = CustomerLoanSerializer(loans, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(get_ingestion_status(task_id), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -170,9 +367,15 @@ def api_root(request):
         'endpoints': {
             'register_customer': '/register/',
             'check_eligibility': '/check-eligibility/',
+            'check_eligibility_batch': '/check-eligibility/batch/',
+            'quote_loan_grid': '/check-eligibility/grid/',
+            'max_loan_offer': '/check-eligibility/max-offer/',
             'create_loan': '/create-loan/',
             'view_loan': '/view-loan/<loan_id>/',
+            'view_loan_schedule': '/view-loan/<loan_id>/schedule/',
             'view_customer_loans': '/view-loans/<customer_id>/',
+            'credit_score_cache_stats': '/credit-score-cache/stats/',
+            'ingestion_status': '/ingestion/<task_id>/',
         },
         'documentation': 'See README.md for detailed usage instructions'
     }, status=status.HTTP_200_OK)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Concurrency/latency benchmark of the eligibility and loan read endpoints,
+for comparing a WSGI deployment against the ASGI (async views) one, e.g.:
+
+    ASYNC_VIEWS=False WEB_CONCURRENCY=4 BIND=0.0.0.0:8001 gunicorn -c gunicorn.conf.py
+    ASYNC_VIEWS=True WEB_CONCURRENCY=4 BIND=0.0.0.0:8000 gunicorn -c gunicorn.conf.py
+    python scripts/benchmark_concurrency.py --url http://localhost:8001 --url http://localhost:8000 \
+        --customer-id 1 --loan-id 1 --concurrency 64 --requests 2000
+
+Only the standard library is used, so it runs from any machine.
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def request(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run(method, url, body, concurrency, total):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: request(method, url, body), range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests_per_second': total / elapsed,
+        'p50_ms': quantiles[49] * 1000,
+        'p95_ms': quantiles[94] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'errors': sum(1 for _, ok in results if not ok),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', action='append', required=True, help='Base URL of a deployment; repeat to compare')
+    parser.add_argument('--customer-id', type=int, required=True)
+    parser.add_argument('--loan-id', type=int, required=True)
+    parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight at once')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint and deployment')
+    args = parser.parse_args()
+
+    endpoints = [
+        ('check-eligibility', 'POST', '/check-eligibility/', {
+            'customer_id': args.customer_id, 'loan_amount': 100000, 'interest_rate': 10, 'tenure': 12,
+        }),
+        ('view-loan', 'GET', f'/view-loan/{args.loan_id}/', None),
+        ('view-loans', 'GET', f'/view-loans/{args.customer_id}/', None),
+    ]
+
+    print(f'{args.requests} requests per endpoint, {args.concurrency} concurrent')
+    print(f'{"deployment":<28} {"endpoint":<18} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for base_url in args.url:
+        for name, method, path, body in endpoints:
+            # Warm up connections and caches before measuring
+            run(method, base_url + path, body, args.concurrency, args.concurrency)
+            result = run(method, base_url + path, body, args.concurrency, args.requests)
+            print(
+                f'{base_url:<28} {name:<18} {result["requests_per_second"]:>8.0f} {result["p50_ms"]:>8.1f} '
+                f'{result["p95_ms"]:>8.1f} {result["p99_ms"]:>8.1f} {result["errors"]:>7}'
+            )
+
+
+if __name__ == '__main__':
+    main()